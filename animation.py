@@ -0,0 +1,136 @@
+'''
+Module Name: animation
+
+Purpose: To render a sequence of frames of a scene along a camera path while objects follow transform tracks.
+Each object is tessellated once in object space, an object is only re-projected when the camera or its transform
+changes, frames are rasterized across a thread pool and each image is encoded on a background thread as soon as it
+is rasterized. Frames are built one at a time, so only a few frames are held in memory however long the animation is.
+
+Parameters: objectList, cameraPath, tracks, width, height, nearPlane, farPlane, theta
+objectList: The parametric objects of the scene
+cameraPath: A sequence of (UP, E, G) triples, one per frame
+tracks: A dictionary mapping an object of objectList to its sequence of transformation matrices, one per frame.
+        Objects without a track keep their T and a track shorter than the path holds its last transform.
+width, height, nearPlane, farPlane, theta: The graphics window and camera settings used for every frame
+'''
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+from cameraMatrix import cameraMatrix
+from graphicsWindow import graphicsWindow
+from tessellationCache import tessellationCache
+from wireMesh import wireMesh
+
+
+class animation:
+
+    def __init__(self, objectList, cameraPath, tracks=None, width=640, height=480, nearPlane=10.0, farPlane=50.0, theta=90.0):
+        self.__objectList = list(objectList)
+        self.__cameraPath = list(cameraPath)
+        self.__tracks = dict(tracks) if tracks is not None else {}
+        self.__width = width
+        self.__height = height
+        self.__np = nearPlane
+        self.__fp = farPlane
+        self.__theta = theta
+        # Large enough to hold every tessellation of the scene, so each object is tessellated once
+        self.__cache = tessellationCache(maxBytes=1 << 62)
+        self.__stats = {}
+
+    '''
+    Purpose: To render every frame of the animation
+
+    Parameters: (fileName, workers, backFaceCulling, frustumCulling, keepImages)
+    fileName: Optional file name pattern such as "frame%04d.png". When given, frames are saved on a background thread.
+    workers: Number of threads rasterizing frames concurrently
+    backFaceCulling, frustumCulling: Passed on to the mesh building stage
+    keepImages: Whether the rendered images are kept and returned. Saving long animations with keepImages=False keeps
+    memory bounded.
+
+    Output: The list of rendered PIL images, one per frame, or None when keepImages is False
+    '''
+    def render(self, fileName=None, workers=4, backFaceCulling=False, frustumCulling=True, keepImages=True):
+        workers = max(workers, 1)
+        start = time.perf_counter()
+        projectionSeconds = 0.0
+        frames = 0
+        images = {} if keepImages else None
+        rasterizing = {}  # Rasterization future -> frame number
+        saving = set()
+        meshes = self.__buildMeshes(backFaceCulling, frustumCulling)
+        with ThreadPoolExecutor(max_workers=1) as encoder, ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                built = time.perf_counter()
+                mesh = next(meshes, None)
+                projectionSeconds += time.perf_counter() - built
+                if mesh is None:
+                    break
+                rasterizing[pool.submit(self.__rasterize, mesh)] = frames
+                frames += 1
+                # At most two frames per worker are being rasterized or encoded at any time
+                self.__collect(rasterizing, saving, images, fileName, encoder, 2 * workers)
+            self.__collect(rasterizing, saving, images, fileName, encoder, 0)
+        seconds = time.perf_counter() - start
+        self.__stats = {'frames': frames, 'seconds': seconds, 'projectionSeconds': projectionSeconds,
+                        'framesPerSecond': frames / seconds if seconds > 0.0 else 0.0,
+                        'tessellations': self.__cache.getMisses()}
+        return [images[frame] for frame in range(frames)] if keepImages else None
+
+    def __collect(self, rasterizing, saving, images, fileName, encoder, limit):
+        # Hands each frame to the encoder as soon as it is rasterized, until at most limit frames are in flight
+        while len(rasterizing) + len(saving) > limit:
+            done, _ = wait(set(rasterizing) | saving, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in saving:
+                    saving.discard(future)
+                    future.result()
+                    continue
+                frame = rasterizing.pop(future)
+                image = future.result()
+                if images is not None:
+                    images[frame] = image
+                if fileName is not None:
+                    saving.add(encoder.submit(image.save, fileName % frame))
+
+    def __buildMeshes(self, backFaceCulling, frustumCulling):
+        # A generator, so that each frame's mesh is only built when the frame is about to be rasterized
+        window = graphicsWindow(self.__width, self.__height)
+        previous = [None] * len(self.__objectList)  # (camera key, T, result) of the last projection of each object
+        for frame, (UP, E, G) in enumerate(self.__cameraPath):
+            cameraKey = tuple(np.concatenate([UP.getArray().ravel(), E.getArray().ravel(), G.getArray().ravel()]))
+            camera = None
+            results = []
+            for index, object in enumerate(self.__objectList):
+                T = self.getTransform(object, frame)
+                last = previous[index]
+                # Reuse the previous frame's projection when neither the camera nor the transform changed
+                if last is not None and last[0] == cameraKey and np.array_equal(last[1], T.getArray()):
+                    results.append(last[2])
+                    continue
+                if camera is None:
+                    camera = cameraMatrix(window, UP, E, G, self.__np, self.__fp, self.__theta)
+                result = wireMesh.buildObject(object, camera, backFaceCulling, frustumCulling, self.__cache, T)
+                previous[index] = (cameraKey, T.getArray().copy(), result)
+                results.append(result)
+            yield wireMesh.fromResults(self.__objectList, results)
+
+    def __rasterize(self, mesh):
+        window = graphicsWindow(self.__width, self.__height)
+        window.drawWireMesh(mesh)
+        return window.getImage()
+
+    def getTransform(self, object, frame):
+        track = self.__tracks.get(object)
+        if not track:
+            return object.getT()
+        return track[min(frame, len(track) - 1)]
+
+    def getNumberOfFrames(self):
+        return len(self.__cameraPath)
+
+    def getStats(self):
+        return self.__stats
+
+    def getFramesPerSecond(self):
+        return self.__stats.get('framesPerSecond', 0.0)
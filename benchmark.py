@@ -0,0 +1,236 @@
+'''
+Module Name: benchmark
+
+Purpose: To measure the render pipeline on a set of standard scenes. Every scene is rendered for each combination of
+tessellation density and window resolution and each pipeline stage is timed separately, so that results can be saved
+in a machine readable form and compared across runs.
+
+Parameters: scenes, scales, resolutions, repeat
+scenes: Names of the scenes to render, any of benchmark.SCENES
+scales: Tessellation density factors, each object's uvDelta is divided by the factor
+resolutions: (width, height) window sizes
+repeat: Number of times each measurement is repeated, the fastest and median times are kept
+'''
+
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from math import pi
+import numpy as np
+from cameraMatrix import cameraMatrix
+from graphicsWindow import graphicsWindow
+from parametricCircle import parametricCircle
+from parametricCone import parametricCone
+from parametricCylinder import parametricCylinder
+from parametricPlane import parametricPlane
+from parametricSphere import parametricSphere
+from parametricTorus import parametricTorus
+from point import point
+from transform import transform
+from vector import vector
+from wireMesh import wireMesh
+
+
+class benchmark:
+
+    SCENES = ('assignment', 'denseSphere', 'instances', 'insideGeometry')
+    STAGES = ('tessellation', 'wireMesh', 'projection', 'sort', 'drawWireMesh', 'saveImage')
+
+    def __init__(self, scenes=SCENES, scales=(1.0, 2.0, 4.0), resolutions=((640, 480), (2800, 1600)), repeat=3):
+        for name in scenes:
+            if name not in self.SCENES:
+                raise ValueError("Unknown scene " + repr(name))
+        self.__scenes = tuple(scenes)
+        self.__scales = tuple(scales)
+        self.__resolutions = tuple(tuple(resolution) for resolution in resolutions)
+        self.__repeat = max(int(repeat), 1)
+        self.__results = []
+
+    '''
+    Purpose: To render every scene at every tessellation scale and resolution and time each stage
+
+    Parameters: N/A
+
+    Output: A list of result dictionaries, one per (scene, scale, resolution), also kept for getResults
+    '''
+    def run(self):
+        self.__results = []
+        for name in self.__scenes:
+            for scale in self.__scales:
+                for width, height in self.__resolutions:
+                    self.__results.append(self.measure(name, scale, width, height))
+        return self.__results
+
+    '''
+    Purpose: To time the pipeline stages for one scene, scale and resolution
+
+    Parameters: (name, scale, width, height)
+    name: The scene name
+    scale: The tessellation density factor
+    width, height: The window size
+
+    Output: A dictionary with the configuration, the scene size and the fastest and median seconds of each stage
+    '''
+    def measure(self, name, scale, width, height):
+        times = {stage: [] for stage in self.STAGES}
+        handle, fileName = tempfile.mkstemp(suffix='.png')
+        os.close(handle)
+        try:
+            for _ in range(self.__repeat):
+                window = graphicsWindow(width, height)
+                camera, objectList = self.getScene(name, window, scale)
+
+                start = time.perf_counter()
+                tessellations = [object.getTessellation() for object in objectList]
+                times['tessellation'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                mesh = wireMesh(objectList, camera)
+                times['wireMesh'].append(time.perf_counter() - start)
+
+                # Unclipped points behind the eye divide by a zero or negative w, which is fine for timing
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    start = time.perf_counter()
+                    for object, (points, normals, faces) in zip(objectList, tessellations):
+                        camera.worldToPixelCoordinatesBatch(points, object.getT())
+                    times['projection'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                np.argsort(-mesh.getFaceDepths(), kind='stable')
+                times['sort'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                window.drawWireMesh(mesh)
+                times['drawWireMesh'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                window.saveImage(fileName)
+                times['saveImage'].append(time.perf_counter() - start)
+        finally:
+            os.remove(fileName)
+        result = {'scene': name, 'scale': scale, 'width': width, 'height': height, 'repeat': self.__repeat,
+                  'objects': len(objectList),
+                  'vertices': int(sum(points.shape[0] for points, normals, faces in tessellations)),
+                  'faces': mesh.getNumberOfFaces(),
+                  'culledFaces': mesh.getNumberOfCulledFaces(),
+                  'clippedFaces': mesh.getNumberOfClippedFaces()}
+        for stage in self.STAGES:
+            result[stage + 'Min'] = min(times[stage])
+            result[stage + 'Median'] = float(np.median(times[stage]))
+        # wireMesh construction already includes tessellation and projection, and drawWireMesh its own depth sort
+        result['totalMin'] = sum(result[stage + 'Min'] for stage in self.STAGES
+                                 if stage not in ('tessellation', 'projection', 'sort'))
+        return result
+
+    '''
+    Purpose: To build one of the standard scenes
+
+    Parameters: (name, window, scale)
+    name: The scene name
+    window: The graphics window the camera renders to
+    scale: The tessellation density factor
+
+    Output: A (camera, objectList) pair
+    '''
+    def getScene(self, name, window, scale=1.0):
+        if name == 'assignment':
+            camera = cameraMatrix(window, vector(0.0, 0.0, 1.0), point(40.0, 40.0, 85.0), point(0.0, 0.0, 0.0), 10.0, 200.0, 45.0)
+            objectList = [
+                parametricPlane(transform().translate(Ty=-50.0), 20.0, 20.0, (255, 255, 0), (0.0, 0.0, 0.0, 0.0),
+                                (0.0, 1.0), (0.0, 1.0), (1.0 / 10.0, 1.0 / 10.0)),
+                parametricCircle(transform().translate(Tx=-40.0, Ty=40.0), 10.0, (0, 255, 255), (0.0, 0.0, 0.0, 0.0),
+                                 (0.0, 1.0), (0.0, 2.0 * pi), (1.0 / 10.0, pi / 18.0)),
+                parametricSphere(transform().translate(), 10.0, (255, 0, 0), (0.0, 0.0, 0.0, 0.0),
+                                 (0.0, 2.0 * pi), (0.0, pi), (pi / 18.0, pi / 18.0)),
+                parametricCone(transform().translate(Tx=-40.0), 20.0, 10.0, (0, 0, 255), (0.0, 0.0, 0.0, 0.0),
+                               (0.0, 1.0), (0.0, 2.0 * pi), (1.0 / 10.0, pi / 18.0)),
+                parametricCylinder(transform().translate(Tx=40.0), 20.0, 10.0, (255, 0, 255), (0.0, 0.0, 0.0, 0.0),
+                                   (0.0, 1.0), (0.0, 2.0 * pi), (1.0 / 10.0, pi / 18.0)),
+                parametricTorus(transform().translate(), 20.0, 5.0, (0, 255, 0), (0.0, 0.0, 0.0, 0.0),
+                                (0.0, 2.0 * pi), (0.0, 2.0 * pi), (pi / 18.0, pi / 9.0))]
+        elif name == 'denseSphere':
+            camera = cameraMatrix(window, vector(0.0, 0.0, 1.0), point(30.0, 30.0, 20.0), point(0.0, 0.0, 0.0), 10.0, 100.0, 45.0)
+            objectList = [parametricSphere(transform().translate(), 15.0, (255, 0, 0), (0.0, 0.0, 0.0, 0.0),
+                                           (0.0, 2.0 * pi), (0.0, pi), (pi / 90.0, pi / 90.0))]
+        elif name == 'instances':
+            camera = cameraMatrix(window, vector(0.0, 0.0, 1.0), point(120.0, 120.0, 90.0), point(0.0, 0.0, 0.0), 10.0, 400.0, 45.0)
+            objectList = []
+            for i in range(10):
+                for j in range(10):
+                    T = transform().translate(Tx=20.0 * i - 90.0, Ty=20.0 * j - 90.0)
+                    if (i + j) % 2 == 0:
+                        objectList.append(parametricSphere(T, 5.0, (255, 0, 0), (0.0, 0.0, 0.0, 0.0),
+                                                           (0.0, 2.0 * pi), (0.0, pi), (pi / 18.0, pi / 18.0)))
+                    else:
+                        objectList.append(parametricCone(T, 10.0, 5.0, (0, 0, 255), (0.0, 0.0, 0.0, 0.0),
+                                                         (0.0, 1.0), (0.0, 2.0 * pi), (1.0 / 10.0, pi / 18.0)))
+        elif name == 'insideGeometry':
+            # The eye sits inside a sphere and a torus tube, so most faces need near plane clipping
+            camera = cameraMatrix(window, vector(0.0, 0.0, 1.0), point(20.0, 0.0, 0.0), point(0.0, 20.0, 0.0), 1.0, 200.0, 60.0)
+            objectList = [
+                parametricSphere(transform().translate(), 60.0, (255, 0, 0), (0.0, 0.0, 0.0, 0.0),
+                                 (0.0, 2.0 * pi), (0.0, pi), (pi / 18.0, pi / 18.0)),
+                parametricTorus(transform().translate(), 20.0, 5.0, (0, 255, 0), (0.0, 0.0, 0.0, 0.0),
+                                (0.0, 2.0 * pi), (0.0, 2.0 * pi), (pi / 18.0, pi / 9.0))]
+        else:
+            raise ValueError("Unknown scene " + repr(name))
+        for object in objectList:
+            du, dv = object.getUVDelta()
+            object.setUVDelta((du / scale, dv / scale))
+        return camera, objectList
+
+    def getResults(self):
+        return self.__results
+
+    def getEnvironment(self):
+        return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+    '''
+    Purpose: To write the results of the last run as JSON (with the environment) or CSV
+
+    Parameters: (stream, format)
+    stream: A writable text stream
+    format: "json" or "csv"
+
+    Output: N/A
+    '''
+    def write(self, stream, format='json'):
+        if format == 'json':
+            json.dump({'environment': self.getEnvironment(), 'results': self.__results}, stream, indent=2)
+            stream.write('\n')
+        elif format == 'csv':
+            if self.__results:
+                writer = csv.DictWriter(stream, fieldnames=list(self.__results[0]))
+                writer.writeheader()
+                writer.writerows(self.__results)
+        else:
+            raise ValueError("Unknown format " + repr(format))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Time the render pipeline stages on standard scenes.')
+    parser.add_argument('--scenes', nargs='+', default=list(benchmark.SCENES), choices=benchmark.SCENES)
+    parser.add_argument('--scales', nargs='+', type=float, default=[1.0, 2.0, 4.0])
+    parser.add_argument('--resolutions', nargs='+', default=['640x480', '2800x1600'], help='WIDTHxHEIGHT window sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--output', help='File to write the results to, standard output by default')
+    options = parser.parse_args(arguments)
+    resolutions = [tuple(int(size) for size in resolution.lower().split('x')) for resolution in options.resolutions]
+    suite = benchmark(options.scenes, options.scales, resolutions, options.repeat)
+    suite.run()
+    if options.output is None:
+        suite.write(sys.stdout, options.format)
+    else:
+        with open(options.output, 'w', newline='') as stream:
+            suite.write(stream, options.format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+'''
+Module Name: boundingVolumeHierarchy
+
+Purpose: A bounding volume hierarchy of axis aligned boxes over scene objects or over the faces of a mesh, so that ray
+casting, picking and overlap queries only test the primitives whose boxes they reach instead of every primitive.
+The tree is built one level at a time with every node of the level split at once, by median or binned surface area
+heuristic (SAH) splits, and queries walk the tree for a whole batch of rays or boxes together. When objects move, the
+node boxes are refit bottom up without rebuilding the tree.
+
+Parameters: low, high, method, leafSize, bins
+low, high: (N,3) numpy arrays with the minimum and maximum corners of the primitive boxes
+method: "sah" or "median"
+leafSize: Largest number of primitives in a leaf
+bins: Number of candidate split positions tried per node by the SAH build
+'''
+
+import numpy as np
+
+
+class boundingVolumeHierarchy:
+
+    def __init__(self, low, high, method='sah', leafSize=4, bins=8):
+        if method not in ('sah', 'median'):
+            raise ValueError("Unknown split method " + repr(method))
+        self.__method = method
+        self.__leafSize = max(int(leafSize), 1)
+        self.__bins = max(int(bins), 2)
+        self.__objectList = None
+        self.__build(np.asarray(low, dtype=float).reshape(-1, 3), np.asarray(high, dtype=float).reshape(-1, 3))
+
+    '''
+    Purpose: To build a hierarchy over the world space boxes of scene objects
+
+    Parameters: (objectList, method, leafSize)
+    objectList: Parametric or instanced objects
+
+    Output: A boundingVolumeHierarchy whose primitive i is objectList[i]. refitObjects updates it after T changes.
+    '''
+    @classmethod
+    def fromObjects(cls, objectList, method='sah', leafSize=4):
+        objectList = list(objectList)
+        low, high = cls.getObjectBoxes(objectList)
+        hierarchy = cls(low, high, method, leafSize)
+        hierarchy.__objectList = objectList
+        return hierarchy
+
+    '''
+    Purpose: To build a hierarchy over the faces of a wireMesh in world coordinates
+
+    Parameters: (mesh, method, leafSize)
+    mesh: A wireMesh
+
+    Output: A boundingVolumeHierarchy whose primitive i is face i of the mesh
+    '''
+    @classmethod
+    def fromMesh(cls, mesh, method='sah', leafSize=4):
+        corners = mesh.getVertexPositions()[mesh.getFaces()]
+        return cls(corners.min(axis=1), corners.max(axis=1), method, leafSize)
+
+    @staticmethod
+    def getObjectBoxes(objectList):
+        low = np.empty((len(objectList), 3))
+        high = np.empty((len(objectList), 3))
+        for index, object in enumerate(objectList):
+            low[index], high[index] = object.getWorldBox()
+        return low, high
+
+    def __build(self, low, high):
+        count = low.shape[0]
+        capacity = max(2 * count - 1, 1)
+        self.__first = np.zeros(capacity, dtype=np.int64)  # Start of each node's primitives in __order
+        self.__count = np.zeros(capacity, dtype=np.int64)
+        self.__left = np.full(capacity, -1, dtype=np.int64)  # Children of internal nodes, -1 for leaves
+        self.__right = np.full(capacity, -1, dtype=np.int64)
+        self.__order = np.arange(count)
+        self.__levels = []  # Node ids of each depth, parents before children
+        centers = (low + high) / 2.0
+        nodes = np.array([0])
+        starts = np.array([0])
+        ends = np.array([count])
+        used = 1
+        while nodes.shape[0] > 0:
+            self.__levels.append(nodes)
+            self.__first[nodes] = starts
+            self.__count[nodes] = ends - starts
+            split = ends - starts > self.__leafSize
+            nodes, starts, ends = nodes[split], starts[split], ends[split]
+            if nodes.shape[0] == 0:
+                break
+            # Sort the primitives of every node being split along the longest axis of its centroid bounds
+            ordered = centers[self.__order]
+            extent = self.__reduce(np.maximum, ordered, starts, ends) - self.__reduce(np.minimum, ordered, starts, ends)
+            axis = np.argmax(extent, axis=1)
+            sizes = ends - starts
+            segment = np.repeat(np.arange(nodes.shape[0]), sizes)
+            position = starts[segment] + np.arange(segment.shape[0]) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            key = ordered[position, axis[segment]]
+            self.__order[position] = self.__order[position[np.lexsort((key, segment))]]
+            if self.__method == 'median':
+                middle = starts + sizes // 2
+            else:
+                middle = self.__sahSplit(low[self.__order], high[self.__order], starts, ends)
+            children = used + 2 * np.arange(nodes.shape[0])
+            self.__left[nodes] = children
+            self.__right[nodes] = children + 1
+            used += 2 * nodes.shape[0]
+            nodes = np.stack((children, children + 1), axis=1).ravel()
+            starts, ends = np.stack((starts, middle), axis=1).ravel(), np.stack((middle, ends), axis=1).ravel()
+        self.__nodes = used
+        self.__low = np.empty((used, 3))
+        self.__high = np.empty((used, 3))
+        self.refit(low, high)
+
+    def __sahSplit(self, low, high, starts, ends):
+        # Binned SAH: try bins-1 split positions per node along its sorted primitives and keep the cheapest
+        sizes = ends - starts
+        fractions = np.arange(1, self.__bins) / self.__bins
+        candidates = starts[:, None] + np.ceil(fractions[None, :] * sizes[:, None]).astype(np.int64)
+        candidates = np.clip(candidates, starts[:, None] + 1, ends[:, None] - 1)
+        first = np.repeat(starts, candidates.shape[1])
+        last = np.repeat(ends, candidates.shape[1])
+        middle = candidates.ravel()
+        cost = np.zeros(middle.shape[0])
+        for a, b in ((first, middle), (middle, last)):
+            extent = self.__reduce(np.maximum, high, a, b) - self.__reduce(np.minimum, low, a, b)
+            area = extent[:, 0] * extent[:, 1] + extent[:, 1] * extent[:, 2] + extent[:, 2] * extent[:, 0]
+            cost += area * (b - a)
+        best = np.argmin(cost.reshape(candidates.shape), axis=1)
+        return candidates[np.arange(candidates.shape[0]), best]
+
+    @staticmethod
+    def __reduce(ufunc, values, starts, ends):
+        # ufunc over each row range [start, end) at once; the padding row keeps the end indices in bounds
+        padded = np.concatenate((values, values[-1:]))
+        return ufunc.reduceat(padded, np.stack((starts, ends), axis=1).ravel(), axis=0)[0::2]
+
+    '''
+    Purpose: To update the primitive boxes and refit the node boxes bottom up, keeping the tree structure
+
+    Parameters: (low, high, indices)
+    low, high: New (N,3) boxes of all primitives, or of the primitives in indices
+    indices: Optional indices of the primitives which moved
+
+    Output: N/A
+    '''
+    def refit(self, low, high, indices=None):
+        if indices is None:
+            self.__boxLow = np.array(low, dtype=float).reshape(-1, 3)
+            self.__boxHigh = np.array(high, dtype=float).reshape(-1, 3)
+        else:
+            self.__boxLow[indices] = low
+            self.__boxHigh[indices] = high
+        if self.__order.shape[0] == 0:
+            self.__low[...] = np.inf
+            self.__high[...] = -np.inf
+            return
+        low = self.__boxLow[self.__order]
+        high = self.__boxHigh[self.__order]
+        for nodes in reversed(self.__levels):
+            leaf = self.__left[nodes] < 0
+            leaves = nodes[leaf]
+            if leaves.shape[0] > 0:
+                starts = self.__first[leaves]
+                self.__low[leaves] = self.__reduce(np.minimum, low, starts, starts + self.__count[leaves])
+                self.__high[leaves] = self.__reduce(np.maximum, high, starts, starts + self.__count[leaves])
+            inner = nodes[~leaf]
+            self.__low[inner] = np.minimum(self.__low[self.__left[inner]], self.__low[self.__right[inner]])
+            self.__high[inner] = np.maximum(self.__high[self.__left[inner]], self.__high[self.__right[inner]])
+
+    '''
+    Purpose: To refit a hierarchy built by fromObjects after the transforms of its objects changed
+
+    Parameters: indices: Optional indices of the objects which moved, all objects by default
+
+    Output: N/A
+    '''
+    def refitObjects(self, indices=None):
+        if indices is None:
+            self.refit(*self.getObjectBoxes(self.__objectList))
+        else:
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            self.refit(*self.getObjectBoxes([self.__objectList[i] for i in indices]), indices)
+
+    '''
+    Purpose: To find for a batch of rays the primitives whose boxes they pass through
+
+    Parameters: (O, D, tMin, tMax)
+    O, D: (R,3) numpy arrays of ray origins and directions (or a single shared origin of shape (3,))
+    tMin, tMax: Range of the ray parameter t in which boxes are reached
+
+    Output: A (rays, primitives) pair of equally long index arrays, one entry per candidate (ray, primitive) pair
+    '''
+    def intersectRays(self, O, D, tMin=0.0, tMax=np.inf):
+        D = np.asarray(D, dtype=float).reshape(-1, 3)
+        O = np.broadcast_to(np.asarray(O, dtype=float), D.shape)
+        with np.errstate(divide='ignore'):
+            inverse = 1.0 / D
+
+        def reached(rays, low, high):
+            origin = O[rays]
+            scale = inverse[rays]
+            with np.errstate(invalid='ignore'):
+                a = (low - origin) * scale
+                b = (high - origin) * scale
+            # fmin/fmax ignore the nan of rays lying in a slab's boundary plane
+            entry = np.fmin(a, b)
+            leave = np.fmax(a, b)
+            near = np.fmax(np.fmax(entry[:, 0], entry[:, 1]), np.fmax(entry[:, 2], tMin))
+            far = np.fmin(np.fmin(leave[:, 0], leave[:, 1]), np.fmin(leave[:, 2], tMax))
+            return near <= far
+
+        return self.__traverse(D.shape[0], reached)
+
+    '''
+    Purpose: To find for a batch of query boxes the primitives whose boxes overlap them, e.g. for occlusion or
+    collision tests
+
+    Parameters: (low, high): (Q,3) numpy arrays of the query boxes
+
+    Output: A (queries, primitives) pair of equally long index arrays
+    '''
+    def queryBoxes(self, low, high):
+        low = np.asarray(low, dtype=float).reshape(-1, 3)
+        high = np.asarray(high, dtype=float).reshape(-1, 3)
+
+        def reached(queries, boxLow, boxHigh):
+            return ((boxLow <= high[queries]) & (boxHigh >= low[queries])).all(axis=1)
+
+        return self.__traverse(low.shape[0], reached)
+
+    def __traverse(self, queryCount, reached):
+        # Breadth first over all (query, node) pairs at once
+        queries = np.arange(queryCount)
+        nodes = np.zeros(queryCount, dtype=np.int64)
+        if self.__order.shape[0] == 0:
+            queries = queries[:0]
+        foundQueries = []
+        foundPrimitives = []
+        while queries.shape[0] > 0:
+            hit = reached(queries, self.__low[nodes], self.__high[nodes])
+            queries, nodes = queries[hit], nodes[hit]
+            leaf = self.__left[nodes] < 0
+            counts = self.__count[nodes[leaf]]
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            leafQueries = np.repeat(queries[leaf], counts)
+            primitives = self.__order[np.repeat(self.__first[nodes[leaf]], counts) + offsets]
+            # The primitives of a reached leaf are tested against their own boxes
+            hit = reached(leafQueries, self.__boxLow[primitives], self.__boxHigh[primitives])
+            foundQueries.append(leafQueries[hit])
+            foundPrimitives.append(primitives[hit])
+            queries = np.repeat(queries[~leaf], 2)
+            nodes = np.stack((self.__left[nodes[~leaf]], self.__right[nodes[~leaf]]), axis=1).ravel()
+        if not foundQueries:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(foundQueries), np.concatenate(foundPrimitives)
+
+    '''
+    Purpose: To pick the nearest face of a mesh hit by each ray, using a hierarchy built by fromMesh
+
+    Parameters: (mesh, O, D, tMin, tMax)
+    mesh: The wireMesh the hierarchy was built from
+    O, D: (R,3) numpy arrays of world space ray origins and directions (or a single shared origin)
+
+    Output: A (faces, t) pair of (R,) arrays: the index of the nearest face hit by each ray (-1 on a miss) and its
+    ray parameter (inf on a miss)
+    '''
+    def pickFaces(self, mesh, O, D, tMin=0.0, tMax=np.inf):
+        D = np.asarray(D, dtype=float).reshape(-1, 3)
+        O = np.broadcast_to(np.asarray(O, dtype=float), D.shape)
+        rays, faces = self.intersectRays(O, D, tMin, tMax)
+        corners = mesh.getVertexPositions()[mesh.getFaces()[faces]]
+        nearest = np.full(D.shape[0], np.inf)
+        picked = np.full(D.shape[0], -1)
+        # Moller-Trumbore against the fan triangles of every candidate face
+        for k in range(1, corners.shape[1] - 1):
+            a, b, c = corners[:, 0], corners[:, k], corners[:, k + 1]
+            e1, e2 = b - a, c - a
+            p = np.cross(D[rays], e2)
+            determinant = np.einsum('ij,ij->i', e1, p)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                inverse = 1.0 / determinant
+                s = O[rays] - a
+                u = np.einsum('ij,ij->i', s, p) * inverse
+                q = np.cross(s, e1)
+                v = np.einsum('ij,ij->i', D[rays], q) * inverse
+                t = np.einsum('ij,ij->i', e2, q) * inverse
+                hit = (np.abs(determinant) > 1e-12) & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= tMin) & (t <= tMax)
+            order = np.lexsort((t[hit], rays[hit]))
+            hitRays, hitFaces, hitT = rays[hit][order], faces[hit][order], t[hit][order]
+            first = np.concatenate(([True], hitRays[1:] != hitRays[:-1])) if hitRays.shape[0] > 0 else np.empty(0, dtype=bool)
+            hitRays, hitFaces, hitT = hitRays[first], hitFaces[first], hitT[first]
+            closer = hitT < nearest[hitRays]
+            nearest[hitRays[closer]] = hitT[closer]
+            picked[hitRays[closer]] = hitFaces[closer]
+        return picked, nearest
+
+    def getObjectList(self):
+        return self.__objectList
+
+    def getNumberOfNodes(self):
+        return self.__nodes
+
+    def getNumberOfPrimitives(self):
+        return self.__order.shape[0]
+
+    def getDepth(self):
+        return len(self.__levels)
+
+    def getBounds(self):
+        return self.__low[0], self.__high[0]
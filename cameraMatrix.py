@@ -42,7 +42,7 @@ class cameraMatrix:
         self.__V = self.__N.crossProduct(self.__U)
 
         self.__Mv = self.__setMv(self.__U, self.__V, self.__N, self.__E)
-        self.__C = W2*S2*T2*S1*T1*Mp
+        self.__C = matrix.chain(W2, S2, T2, S1, T1, Mp)
         self.__M = self.__C*self.__Mv
 
     '''
@@ -65,22 +65,14 @@ class cameraMatrix:
     '''
 
     def __setMv(self, U, V, N, E):
-        mv = matrix(np.identity(4))
+        mv = np.identity(4)
 
         # Maintaining the intial rotation of the camera by assinging the identity matrix's 3x3 values
-        values = [U, V, N]
-        for i in range(0, 3):
-            for j in range(0, 3):
-                mv.set(i, j, values[i].get(j, 0))
+        mv[0:3, 0:3] = np.hstack((U.getArray(), V.getArray(), N.getArray())).T
 
         # Computing and assinging the last column values of the view matrix which is the translated position
-        mv.set(0, 3, -(E.get(0, 0) * U.get(0, 0) + E.get(1, 0)
-                       * U.get(1, 0) + E.get(2, 0) * U.get(2, 0)))
-        mv.set(1, 3, -(E.get(0, 0) * V.get(0, 0) + E.get(1, 0)
-                       * V.get(1, 0) + E.get(2, 0) * V.get(2, 0)))
-        mv.set(2, 3, -(E.get(0, 0) * N.get(0, 0) + E.get(1, 0)
-                       * N.get(1, 0) + E.get(2, 0) * N.get(2, 0)))
-        return mv
+        mv[0:3, 3] = -(mv[0:3, 0:3] @ E.getArray()[0:3, 0])
+        return matrix(mv)
 
     '''
     Module Name: __setMp
@@ -222,7 +214,8 @@ class cameraMatrix:
         return self.__M*P
 
     def worldToPixelCoordinates(self, P):
-        return self.__M*P.scalarMultiply(1.0/(self.__M*P).get(3, 0))
+        Q = self.__M*P
+        return Q.scalarMultiply(1.0/Q.get(3, 0))
 
     def viewingToImageCoordinates(self, P):
         return self.__C*P
@@ -233,6 +226,115 @@ class cameraMatrix:
     def imageToPixelCoordinates(self, P):
         return P.scalarMultiply(1.0/P.get(3, 0))
 
+    '''
+    Purpose: Batched versions of the world coordinate transformations which operate on a whole array of points at once
+
+    Parameters: (P, T)
+    P: An (N,4) numpy array of homogeneous points, one point per row
+    T: Optional object transformation (matrix or 4x4 numpy array) applied to the points before the camera transformation
+
+    Output: An (N,4) numpy array of the transformed points. The pixel coordinates carry the pseudo depth in column 2.
+    '''
+
+    def worldToViewingCoordinatesBatch(self, P, T=None):
+        return np.asarray(P) @ self.__composite(self.__Mv, T).T
+
+    def worldToImageCoordinatesBatch(self, P, T=None):
+        return np.asarray(P) @ self.__composite(self.__M, T).T
+
+    def worldToPixelCoordinatesBatch(self, P, T=None):
+        Q = self.worldToImageCoordinatesBatch(P, T)
+        return Q / Q[:, 3:4]
+
+    '''
+    Purpose: To clip a batch of convex polygons in image (clip space) coordinates against the near and far planes
+
+    Parameters: (polygons, counts)
+    polygons: An (F,K,4) numpy array of homogeneous polygon corners produced by worldToImageCoordinatesBatch. Corners
+              may carry further attributes in extra columns after the 4 coordinates, which are interpolated along.
+    counts: Optional (F,) integer array with the number of corners used by each polygon (default K)
+
+    Output: A (polygons, counts) pair. Polygons clipped away entirely have a count of 0 and unused corners repeat the last one.
+    '''
+
+    def clipPolygons(self, polygons, counts=None):
+        polygons = np.asarray(polygons, dtype=float)
+        if counts is None:
+            counts = np.full(polygons.shape[0], polygons.shape[1])
+        # In image coordinates the viewing volume satisfies -w <= z <= w
+        for plane in (np.array([0.0, 0.0, 1.0, 1.0]), np.array([0.0, 0.0, -1.0, 1.0])):
+            polygons, counts = self.__clipPolygonsToPlane(polygons, counts, plane)
+        return polygons[:, 0:max(int(counts.max(initial=1)), 1)], counts
+
+    def __clipPolygonsToPlane(self, P, counts, plane):
+        # Sutherland-Hodgman over all polygons at once: edge i keeps its start corner when it is
+        # inside and adds the intersection point when the edge crosses the plane
+        F, K, D = P.shape
+        index = np.arange(K)
+        valid = index < counts[:, None]
+        following = np.where(index + 1 < counts[:, None], index + 1, 0)
+        Q = np.take_along_axis(P, following[:, :, None], axis=1)
+        dP = P[:, :, 0:4] @ plane
+        dQ = Q[:, :, 0:4] @ plane
+        insideP = dP >= 0.0
+        crossing = valid & (insideP != (dQ >= 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(crossing, dP / (dP - dQ), 0.0)
+        candidates = np.stack((P, P + t[:, :, None] * (Q - P)), axis=2).reshape(F, 2*K, D)
+        emit = np.stack((valid & insideP, crossing), axis=2).reshape(F, 2*K)
+        newCounts = emit.sum(axis=1)
+        position = np.cumsum(emit, axis=1) - 1
+        out = np.zeros((F, K + 1, D))
+        f, j = np.nonzero(emit)
+        out[f, position[f, j]] = candidates[f, j]
+        last = out[np.arange(F), np.maximum(newCounts - 1, 0)]
+        padding = np.arange(K + 1)[None, :] >= newCounts[:, None]
+        out[padding] = np.broadcast_to(last[:, None, :], out.shape)[padding]
+        return out, newCounts
+
+    def __composite(self, M, T):
+        if T is None:
+            return M.getArray()
+        if isinstance(T, matrix):
+            T = T.getArray()
+        return M.getArray() @ T
+
+    '''
+    Purpose: To test a bounding sphere against the viewing volume bounded by the near, far and side planes
+
+    Parameters: (center, radius)
+    center: World coordinates (x,y,z) of the sphere's center
+    radius: Float value of the sphere's radius
+
+    Output: False if the sphere lies entirely outside the viewing volume, True otherwise
+    '''
+
+    def isSphereInFrustum(self, center, radius):
+        return bool(self.areSpheresInFrustum([center], [radius])[0])
+
+    '''
+    Purpose: To test many bounding spheres against the viewing volume at once
+
+    Parameters: (centers, radii)
+    centers: A (K,3) array of world coordinates of the sphere centers
+    radii: A (K,) array of the sphere radii
+
+    Output: A (K,) boolean array, False for the spheres which lie entirely outside the viewing volume
+    '''
+
+    def areSpheresInFrustum(self, centers, radii):
+        centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+        radii = np.asarray(radii, dtype=float).reshape(-1)
+        view = centers @ self.__Mv.getArray()[0:3, 0:3].T + self.__Mv.getArray()[0:3, 3]
+        x, y, z = view[:, 0], view[:, 1], view[:, 2]
+        inside = (z + self.__np <= radii) & (-self.__fp - z <= radii)
+        top = self.__np * tan(pi/180.0 * self.__theta / 2.0)
+        right = self.__aspect * top
+        # Outward facing side planes of the viewing volume through the eye
+        for a, b, c in ((self.__np, 0.0, right), (-self.__np, 0.0, right), (0.0, self.__np, top), (0.0, -self.__np, top)):
+            inside &= (a*x + b*y + c*z) / sqrt(a*a + b*b + c*c) <= radii
+        return inside
+
     def getUP(self):
         return self.__UP
 
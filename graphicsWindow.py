@@ -1,41 +1,397 @@
 import operator
-from PIL import Image, ImageDraw
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from renderStats import sharedRenderStats
 
 class graphicsWindow:
 
-    def __init__(self,width=640,height=480):
+    def __init__(self,width=640,height=480,chunkSize=1<<20,tileSize=None,workers=1):
         self.__mode = 'RGB'
         self.__width = width
         self.__height = height
-        self.__canvas = Image.new(self.__mode,(self.__width,self.__height))
-        self.__image = self.__canvas.load()
+        self.__chunkSize = chunkSize  # Maximum number of line samples rasterized per numpy pass
+        self.__frame = np.zeros((self.__height,self.__width,3),dtype=np.uint8)
+        self.__depth = None  # Pseudo depth of the nearest filled surface, allocated when the first surface is drawn
+        self.__depthLock = threading.Lock()
+        self.__tileSize = tileSize  # Side of the square tiles rasterized concurrently, None to draw untiled
+        self.__workers = workers  # Number of threads rasterizing tiles
 
     def drawPoint(self,point,color):
         if 0 <= point[0] < self.__width and 0 <= point[1] < self.__height:
-            self.__image[point[0],point[1]] = color
+            self.__frame[int(point[1]),int(point[0])] = color
 
     def drawLine(self, point1, point2, color):
-            draw = ImageDraw.Draw(self.__canvas)
-            draw.line((point1.get(0,0),point1.get(1,0),point2.get(0,0),point2.get(1,0)),fill=color)
+        self.drawLines(np.array([[[point1.get(0,0),point1.get(1,0)],[point2.get(0,0),point2.get(1,0)]]]),color)
 
-    def drawWireMesh(self,faceList):
-        faceList.sort(key = operator.itemgetter(0),reverse=True)
-        for face in faceList:
-            self.drawPolygon(face[1],face[2])
+    '''
+    Purpose: To rasterize a batch of lines into the frame buffer with a vectorized DDA
+
+    Parameters: (lines, colors)
+    lines: An (E,2,2) array of line end points in pixel coordinates
+    colors: An (E,3) array of RGB colors, or a single color shared by every line
+
+    Output: N/A
+    '''
+    def drawLines(self,lines,colors):
+        lines = np.asarray(lines,dtype=float).reshape(-1,2,2)
+        colors = np.broadcast_to(np.asarray(colors,dtype=np.uint8).reshape(-1,3),(lines.shape[0],3))
+        # At most chunkSize lines are clipped and rasterized per pass, in their original order
+        for first in range(0,lines.shape[0],self.__chunkSize):
+            self.__drawLinesChunk(lines[first:first+self.__chunkSize],colors[first:first+self.__chunkSize])
+
+    def __drawLinesChunk(self,lines,colors):
+        lines,inside = self.clipLines(lines)
+        lines = lines[inside]
+        colors = colors[inside]
+        sharedRenderStats.count('edgesDrawn',lines.shape[0])
+        if lines.shape[0] == 0:
+            return
+        with sharedRenderStats.time('lineRasterization'):
+            if self.__tileSize is None:
+                self.__drawLinesRegion(lines,colors,(0,0,self.__width,self.__height))
+                return
+            low = lines.min(axis=1)
+            high = lines.max(axis=1)
+            self.__drawTiles(self.__drawLinesRegion,lines,colors,low[:,0],high[:,0],low[:,1],high[:,1])
+
+    def __drawLinesRegion(self,lines,colors,region):
+        x0,y0,x1,y1 = region
+        start = lines[:,0]
+        delta = lines[:,1]-lines[:,0]
+        steps = np.ceil(np.abs(delta).max(axis=1,initial=0.0)).astype(np.int64)
+        # Sample only the steps of each line which can land in the region, keeping the whole line's parameterization
+        # so that tiles reproduce exactly the pixels of an untiled pass
+        t0,t1,inside = self.__clipParameters(lines,(x0-1,y0-1,x1+1,y1+1))
+        lower = np.floor(t0*steps).astype(np.int64)
+        samples = np.where(inside,np.ceil(t1*steps).astype(np.int64)-lower+1,0)
+        ends = np.cumsum(samples)
+        first = 0
+        while first < lines.shape[0]:
+            base = ends[first-1] if first > 0 else 0
+            last = max(int(np.searchsorted(ends,base+self.__chunkSize,side='right')),first+1)
+            count = samples[first:last]
+            edge = np.repeat(np.arange(first,last),count)
+            offsets = np.cumsum(count)-count
+            t = lower[edge]+np.arange(edge.shape[0])-np.repeat(offsets,count)
+            t = t/np.maximum(steps[edge],1)
+            x = np.rint(start[edge,0]+delta[edge,0]*t).astype(np.int64)
+            y = np.rint(start[edge,1]+delta[edge,1]*t).astype(np.int64)
+            inside = (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+            self.__frame[y[inside],x[inside]] = colors[edge[inside]]
+            if sharedRenderStats.isEnabled():
+                sharedRenderStats.count('pixelsWritten',np.count_nonzero(inside))
+            first = last
+
+    '''
+    Purpose: To clip a batch of lines to the window bounds with the Liang-Barsky algorithm
+
+    Parameters: (lines, region)
+    lines: An (E,2,2) array of line end points in pixel coordinates
+    region: Optional (x0, y0, x1, y1) pixel rectangle (x1 and y1 exclusive) to clip to instead of the whole window
+
+    Output: A (lines, inside) pair: the clipped lines and a boolean mask of the lines which are at least partly visible
+    '''
+    def clipLines(self,lines,region=None):
+        if region is None:
+            region = (0,0,self.__width,self.__height)
+        lines = np.asarray(lines,dtype=float).reshape(-1,2,2)
+        start = lines[:,0]
+        delta = lines[:,1]-lines[:,0]
+        t0,t1,inside = self.__clipParameters(lines,region)
+        return np.stack((start+t0[:,None]*delta,start+t1[:,None]*delta),axis=1),inside
+
+    def __clipParameters(self,lines,region):
+        start = lines[:,0]
+        delta = lines[:,1]-lines[:,0]
+        low = np.array([region[0]-0.5,region[1]-0.5])
+        high = np.array([region[2]-0.5,region[3]-0.5])
+        p = np.concatenate((-delta,delta),axis=1)
+        q = np.concatenate((start-low,high-start),axis=1)
+        inside = np.isfinite(lines).all(axis=(1,2)) & ~((p == 0.0) & (q < 0.0)).any(axis=1)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            r = q/p
+        t0 = np.where(p < 0.0,r,-np.inf).max(axis=1,initial=0.0)
+        t1 = np.where(p > 0.0,r,np.inf).min(axis=1,initial=1.0)
+        inside &= t0 <= t1
+        return np.where(inside,t0,0.0),np.where(inside,t1,1.0),inside
+
+    '''
+    Purpose: To bin primitives into the fixed size tiles their screen bounding boxes overlap and rasterize the tiles
+    concurrently. Tiles cover disjoint parts of the buffers, so the threads never write the same pixel, and each tile
+    keeps the original primitive order.
+
+    Parameters: (kernel, primitives, colors, xmin, xmax, ymin, ymax)
+    kernel: The rasterizer called as kernel(primitives, colors, region) for every non empty tile
+    xmin, xmax, ymin, ymax: Bounding boxes of the primitives in pixel coordinates
+
+    Output: N/A
+    '''
+    def __drawTiles(self,kernel,primitives,colors,xmin,xmax,ymin,ymax):
+        size = self.__tileSize
+        columns = -(-self.__width//size)
+        rows = -(-self.__height//size)
+        tx0 = np.clip(np.floor((xmin+0.5)/size),0,columns-1).astype(np.int64)
+        tx1 = np.clip(np.floor((xmax+0.5)/size),0,columns-1).astype(np.int64)
+        ty0 = np.clip(np.floor((ymin+0.5)/size),0,rows-1).astype(np.int64)
+        ty1 = np.clip(np.floor((ymax+0.5)/size),0,rows-1).astype(np.int64)
+        spanX = tx1-tx0+1
+        count = spanX*(ty1-ty0+1)
+        primitive = np.repeat(np.arange(primitives.shape[0]),count)
+        local = np.arange(primitive.shape[0])-np.repeat(np.cumsum(count)-count,count)
+        tile = (ty0[primitive]+local//spanX[primitive])*columns+tx0[primitive]+local%spanX[primitive]
+        order = np.argsort(tile,kind='stable')
+        tile = tile[order]
+        primitive = primitive[order]
+        bounds = np.flatnonzero(np.concatenate(([True],tile[1:] != tile[:-1],[True])))
+        jobs = []
+        for first,last in zip(bounds[:-1],bounds[1:]):
+            x0 = (tile[first]%columns)*size
+            y0 = (tile[first]//columns)*size
+            selected = primitive[first:last]
+            region = (x0,y0,min(x0+size,self.__width),min(y0+size,self.__height))
+            jobs.append((primitives[selected],colors[selected],region))
+        if self.__workers > 1:
+            with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+                list(pool.map(lambda job: kernel(*job),jobs))
+        else:
+            for job in jobs:
+                kernel(*job)
+
+    def setTiling(self,tileSize=None,workers=1):
+        self.__tileSize = tileSize
+        self.__workers = workers
+
+    def getTileSize(self):
+        return self.__tileSize
+
+    def getWorkers(self):
+        return self.__workers
+
+    def drawWireMesh(self,mesh):
+        if isinstance(mesh,list):
+            # Legacy face lists of (depth, points, color) tuples
+            mesh.sort(key = operator.itemgetter(0),reverse=True)
+            for face in mesh:
+                self.drawPolygon(face[1],face[2])
+            return
+        # Draw far-to-near by sorting the face depth array instead of Python tuples
+        with sharedRenderStats.time('sort'):
+            order = np.argsort(-mesh.getFaceDepths(),kind='stable')
+        vertices = mesh.getVertices()
+        faces = mesh.getFaces()
+        colors = mesh.getFaceColors()
+        # Edges are built for chunkSize lines at a time, so memory does not grow with the mesh
+        step = max(self.__chunkSize//max(faces.shape[1],1),1)
+        for first in range(0,order.shape[0],step):
+            chunk = order[first:first+step]
+            corners = vertices[faces[chunk]][:,:,0:2]
+            lines = np.stack((corners,np.roll(corners,-1,axis=1)),axis=2).reshape(-1,2,2)
+            self.drawLines(lines,np.repeat(colors[chunk],corners.shape[1],axis=0))
+
+    '''
+    Purpose: To draw faces as they are streamed, e.g. from wireMesh.streamFaces, without holding the whole mesh
+
+    Parameters: stream: An iterable of (corners, colors, ...) chunks with (F,K,>=2) pixel corners and (F,3) colors
+
+    Output: The number of faces drawn
+    '''
+    def drawFaceStream(self,stream):
+        count = 0
+        for chunk in stream:
+            corners = chunk[0][:,:,0:2]
+            lines = np.stack((corners,np.roll(corners,-1,axis=1)),axis=2).reshape(-1,2,2)
+            self.drawLines(lines,np.repeat(chunk[1],corners.shape[1],axis=0))
+            count += corners.shape[0]
+        return count
+
+    '''
+    Purpose: To draw the faces of a mesh as filled polygons using the depth buffer, so draw order does not matter
+
+    Parameters: (mesh, colors, vertexColors)
+    mesh: A wireMesh
+    colors: Optional (F,3) array of face colors, e.g. from shading.shadeFaces. Defaults to the object colors.
+    vertexColors: Optional (V,3) array of vertex colors, e.g. from shading.shadeVertices, which are interpolated
+                  across the faces (Gouraud shading) instead of filling them with the face colors
+
+    Output: N/A
+    '''
+    def drawSolidMesh(self,mesh,colors=None,vertexColors=None):
+        if colors is None:
+            colors = mesh.getFaceColors()
+        faces = mesh.getFaces()
+        if faces.shape[0] == 0:
+            return
+        # Fan triangulation of every (padded) polygon; padding only yields degenerate triangles
+        fan = np.arange(1,faces.shape[1]-1)
+        triangles = np.stack((np.repeat(faces[:,0:1],fan.shape[0],axis=1),faces[:,fan],faces[:,fan+1]),axis=2)
+        triangles = triangles.reshape(-1,3)
+        if vertexColors is not None:
+            colors = np.asarray(vertexColors,dtype=np.uint8)[triangles]
+        else:
+            colors = np.repeat(colors,fan.shape[0],axis=0)
+        self.drawTriangles(mesh.getVertices()[triangles][:,:,0:3],colors)
+
+    '''
+    Purpose: To scan convert a batch of triangles into the frame and depth buffers
+
+    Parameters: (triangles, colors)
+    triangles: A (T,3,3) array of triangle corners in pixel coordinates with the pseudo depth in the last column
+    colors: A (T,3) array of RGB colors, a single color shared by every triangle, or a (T,3,3) array with the colors
+            of each triangle's corners which are interpolated linearly across the triangle
+
+    Output: N/A
+    '''
+    def drawTriangles(self,triangles,colors):
+        triangles = np.asarray(triangles,dtype=float).reshape(-1,3,3)
+        colors = np.asarray(colors,dtype=np.uint8)
+        if colors.ndim < 3:
+            colors = np.broadcast_to(colors.reshape(-1,3),(triangles.shape[0],3))
+        keep = np.isfinite(triangles).all(axis=(1,2))
+        triangles = triangles[keep]
+        colors = colors[keep]
+        sharedRenderStats.count('trianglesDrawn',triangles.shape[0])
+        with sharedRenderStats.time('triangleRasterization'):
+            if self.__tileSize is None:
+                self.__drawTrianglesRegion(triangles,colors,(0,0,self.__width,self.__height))
+                return
+            low = triangles.min(axis=1)
+            high = triangles.max(axis=1)
+            visible = (high[:,0] >= -0.5) & (low[:,0] < self.__width-0.5) & (high[:,1] >= -0.5) & (low[:,1] < self.__height-0.5)
+            self.__drawTiles(self.__drawTrianglesRegion,triangles[visible],colors[visible],
+                             low[visible,0],high[visible,0],low[visible,1],high[visible,1])
+
+    def __drawTrianglesRegion(self,triangles,colors,region):
+        x0,y0,x1,y1 = region
+        x = triangles[:,:,0]
+        y = triangles[:,:,1]
+        area = (x[:,1]-x[:,0])*(y[:,2]-y[:,0])-(x[:,2]-x[:,0])*(y[:,1]-y[:,0])
+        # Pixel centers inside each triangle's bounding box, clamped to the region
+        xmin = np.clip(np.ceil(x.min(axis=1)),x0,x1)
+        xmax = np.clip(np.floor(x.max(axis=1)),x0-1,x1-1)
+        ymin = np.clip(np.ceil(y.min(axis=1)),y0,y1)
+        ymax = np.clip(np.floor(y.max(axis=1)),y0-1,y1-1)
+        keep = (np.abs(area) > 1e-12) & (xmin <= xmax) & (ymin <= ymax)
+        triangles = triangles[keep]
+        colors = colors[keep]
+        planes = self.__getPlanes(triangles,area[keep])
+        origins = triangles[:,0,0:2]
+        xmin = xmin[keep].astype(np.int64)
+        ymin = ymin[keep].astype(np.int64)
+        columns = xmax[keep].astype(np.int64)-xmin+1
+        rows = ymax[keep].astype(np.int64)-ymin+1
+        # Boxes of more than chunkSize pixels are split into bands of rows, so one large triangle stays within a chunk
+        bandRows = np.maximum(self.__chunkSize//columns,1)
+        bands = -(-rows//bandRows)
+        owners = np.repeat(np.arange(triangles.shape[0]),bands)
+        band = np.arange(owners.shape[0])-np.repeat(np.cumsum(bands)-bands,bands)
+        tops = ymin[owners]+band*bandRows[owners]
+        samples = columns[owners]*np.minimum(bandRows[owners],ymin[owners]+rows[owners]-tops)
+        ends = np.cumsum(samples)
+        first = 0
+        while first < owners.shape[0]:
+            base = ends[first-1] if first > 0 else 0
+            last = max(int(np.searchsorted(ends,base+self.__chunkSize,side='right')),first+1)
+            count = samples[first:last]
+            span = np.repeat(np.arange(first,last),count)
+            local = np.arange(span.shape[0])-np.repeat(np.cumsum(count)-count,count)
+            triangle = owners[span]
+            px = xmin[triangle]+local%columns[triangle]
+            py = tops[span]+local//columns[triangle]
+            self.__fillFragments(planes,origins,colors,triangle,px,py)
+            first = last
+
+    @staticmethod
+    def __getPlanes(triangles,area):
+        # The barycentric weights w0, w1 and the pseudo depth are linear in the pixel position. Row k of each (3,3)
+        # block holds (d/dx, d/dy, value at corner 0) of w0, w1 and z, evaluated relative to corner 0 for precision.
+        x = triangles[:,:,0]
+        y = triangles[:,:,1]
+        z = triangles[:,:,2]
+        planes = np.empty((triangles.shape[0],3,3))
+        planes[:,0] = np.stack(((y[:,1]-y[:,2])/area,(x[:,2]-x[:,1])/area,np.ones(area.shape[0])),axis=1)
+        planes[:,1] = np.stack(((y[:,2]-y[:,0])/area,(x[:,0]-x[:,2])/area,np.zeros(area.shape[0])),axis=1)
+        planes[:,2] = planes[:,0]*(z[:,0]-z[:,2])[:,None]+planes[:,1]*(z[:,1]-z[:,2])[:,None]
+        planes[:,2,2] = z[:,0]
+        return planes
+
+    def __fillFragments(self,planes,origins,colors,triangle,px,py):
+        # Barycentric coordinates of every candidate pixel from its triangle's planes, then a depth test
+        dx = px-origins[triangle,0]
+        dy = py-origins[triangle,1]
+        w0 = planes[triangle,0,0]*dx+planes[triangle,0,1]*dy+planes[triangle,0,2]
+        w1 = planes[triangle,1,0]*dx+planes[triangle,1,1]*dy+planes[triangle,1,2]
+        z = planes[triangle,2,0]*dx+planes[triangle,2,1]*dy+planes[triangle,2,2]
+        w2 = 1.0-w0-w1
+        inside = (w0 >= 0.0) & (w1 >= 0.0) & (w2 >= 0.0) & (z >= -1.0) & (z <= 1.0)
+        if not inside.any():
+            return
+        triangle = triangle[inside]
+        colors = colors[triangle]
+        if colors.ndim == 3:
+            # Gouraud shading: blend the corner colors with the barycentric weights
+            weights = np.stack((w0[inside],w1[inside],w2[inside]),axis=1)
+            colors = np.rint(np.einsum('ij,ijk->ik',weights,colors)).astype(np.uint8)
+        self.drawFragments(px[inside],py[inside],z[inside],colors)
+
+    '''
+    Purpose: To write a batch of fragments through the depth buffer, e.g. from a ray caster or the triangle rasterizer
+
+    Parameters: (px, py, z, colors)
+    px, py: (N,) integer pixel coordinates inside the window
+    z: (N,) pseudo depths in [-1,1], smaller is nearer
+    colors: (N,3) uint8 RGB colors
+
+    Output: N/A
+    '''
+    def drawFragments(self,px,py,z,colors):
+        if px.shape[0] == 0:
+            return
+        # Only the nearest fragment per pixel of this batch competes with the depth buffer
+        key = py*self.__width+px
+        order = np.lexsort((z,key))
+        key = key[order]
+        nearest = order[np.concatenate(([True],key[1:] != key[:-1]))]
+        px,py,z,colors = px[nearest],py[nearest],z[nearest],colors[nearest]
+        depth = self.getDepth()
+        closer = z < depth[py,px]
+        depth[py[closer],px[closer]] = z[closer]
+        self.__frame[py[closer],px[closer]] = colors[closer]
+        if sharedRenderStats.isEnabled():
+            sharedRenderStats.count('pixelsWritten',np.count_nonzero(closer))
+
+    def clear(self,color=(0,0,0)):
+        self.__frame[...] = color
+        self.__depth = None
+
+    def getDepth(self):
+        # Wireframe only windows never pay for the buffer; tile threads may ask for it at the same time
+        if self.__depth is None:
+            with self.__depthLock:
+                if self.__depth is None:
+                    self.__depth = np.full((self.__height,self.__width),np.inf)
+        return self.__depth
 
     def drawPolygon(self,pointList,color):
-        for i in range(len(pointList)-1):
-            self.drawLine(pointList[i],pointList[i+1],color)
-        self.drawLine(pointList[-1],pointList[0],color)
+        corners = np.array([[p.get(0,0),p.get(1,0)] for p in pointList])
+        self.drawLines(np.stack((corners,np.roll(corners,-1,axis=0)),axis=1),color)
+
+    def getImage(self):
+        return Image.fromarray(self.__frame,self.__mode)
+
+    def getFrame(self):
+        return self.__frame
 
     def saveImage(self,fileName):
-        self.__canvas.save(fileName)
+        with sharedRenderStats.time('save'):
+            self.getImage().save(fileName)
 
     def showImage(self):
-        self.__canvas.show()
+        self.getImage().show()
 
     def getWidth(self):
         return self.__width
 
     def getHeight(self):
-        return self.__height
\ No newline at end of file
+        return self.__height
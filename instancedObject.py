@@ -0,0 +1,109 @@
+'''
+Module Name: instancedObject
+
+Purpose: To draw many copies of one parametric prototype. The prototype is tessellated once and wireMesh transforms
+and projects all of its instances together with batched matrix products instead of building each copy separately.
+
+Parameters: prototype, transforms, colors, T
+prototype: The parametricObject every instance is a copy of
+transforms: A (K,4,4) array (or a sequence of matrix objects) with the transformation of each of the K instances
+colors: Optional (K,3) array of per instance RGB colors, the prototype's color is used by default
+T: Transformation applied to the whole group on top of the per instance transforms
+'''
+
+import numpy as np
+from matrix import matrix
+from object import object
+
+
+class instancedObject(object):
+
+    def __init__(self, prototype, transforms, colors=None, T=None):
+        super().__init__(T, prototype.getColor(), prototype.getReflectance())
+        self.__prototype = prototype
+        self.setTransforms(transforms)
+        self.setInstanceColors(colors)
+
+    def getPrototype(self):
+        return self.__prototype
+
+    def getTransforms(self):
+        return self.__transforms
+
+    def setTransforms(self, transforms):
+        if not isinstance(transforms, np.ndarray):
+            transforms = [T.getArray() if isinstance(T, matrix) else T for T in transforms]
+        self.__transforms = np.asarray(transforms, dtype=float).reshape(-1, 4, 4)
+
+    '''
+    Purpose: To return the color of every instance
+
+    Parameters: N/A
+
+    Output: A (K,3) uint8 array, the prototype's color repeated when no per instance colors were given
+    '''
+    def getInstanceColors(self):
+        if self.__colors is None:
+            return np.broadcast_to(np.array(self.getColor(), dtype=np.uint8), (self.getNumberOfInstances(), 3))
+        return self.__colors
+
+    def setInstanceColors(self, colors):
+        if colors is not None:
+            colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+            if colors.shape[0] != self.getNumberOfInstances():
+                raise ValueError("Expected one color per instance")
+        self.__colors = colors
+
+    def getNumberOfInstances(self):
+        return self.__transforms.shape[0]
+
+    '''
+    Purpose: To transform the prototype's bounding box corners by every instance at once
+
+    Parameters: T: Optional group transformation used instead of the object's own T
+
+    Output: A (K,8,3) numpy array of world coordinates
+    '''
+    def getWorldCorners(self, T=None):
+        transforms = (T if T is not None else self.getT()).getArray() @ self.__transforms
+        return np.einsum('kij,nj->kni', transforms[:, 0:3], self.__prototype.getBoxCorners())
+
+    '''
+    Purpose: To compute the world space axis aligned box of every instance, or of the whole group
+
+    Parameters: T: Optional group transformation used instead of the object's own T
+
+    Output: getWorldBoxes: A (low, high) pair of (K,3) numpy arrays. getWorldBox: A (low, high) pair of 3 world
+    coordinates enclosing every instance.
+    '''
+    def getWorldBoxes(self, T=None):
+        corners = self.getWorldCorners(T)
+        return corners.min(axis=1), corners.max(axis=1)
+
+    def getWorldBox(self, T=None):
+        low, high = self.getWorldBoxes(T)
+        if low.shape[0] == 0:
+            return np.zeros(3), np.zeros(3)
+        return low.min(axis=0), high.max(axis=0)
+
+    '''
+    Purpose: To compute the world space bounding sphere of every instance at once
+
+    Parameters: T: Optional group transformation used instead of the object's own T
+
+    Output: A (centers, radii) pair of (K,3) and (K,) numpy arrays
+    '''
+    def getBoundingSpheres(self, T=None):
+        corners = self.getWorldCorners(T)
+        centers = corners.mean(axis=1)
+        return centers, np.linalg.norm(corners - centers[:, None], axis=2).max(axis=1)
+
+    def getBoundingSphere(self, T=None):
+        centers, radii = self.getBoundingSpheres(T)
+        if centers.shape[0] == 0:
+            return np.zeros(3), 0.0
+        center = centers.mean(axis=0)
+        return center, float((np.linalg.norm(centers - center, axis=1) + radii).max())
+
+    def getBackFaceCulling(self):
+        return self.__prototype.getBackFaceCulling()
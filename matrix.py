@@ -2,16 +2,21 @@ import numpy as np
 
 class matrix:
 
+    __slots__ = ('__r','__c','__m')
+
     def __init__(self,m):
         self.__r = m.shape[0]
         self.__c = m.shape[1]
         self.__m = m
 
     def set(self,r,c,a):
-        self.__m[r][c] = a
+        self.__m[r,c] = a
 
     def get(self,r,c):
-        return self.__m[r][c]
+        return self.__m[r,c]
+
+    def getArray(self):
+        return self.__m
 
     def getNumberOfRows(self):
         return self.__r
@@ -23,7 +28,7 @@ class matrix:
         return matrix(np.full((self.__r,self.__c),a))
 
     def scalarMultiply(self,a):
-        return matrix(np.dot(self.__m,a))
+        return matrix(self.__m*a)
 
     def norm(self):
         return np.linalg.norm(self.__m)
@@ -32,13 +37,13 @@ class matrix:
         return self.scalarMultiply(1.0/self.norm())
 
     def transpose(self):
-        return matrix(np.transpose(self.__m))
+        return matrix(self.__m.T)
 
     def dotProduct(self,rhs):
-        return matrix(np.dot(np.transpose(self.__m),rhs.__m)).get(0,0)
+        return np.dot(self.__m.T,rhs.__m)[0,0]
 
     def crossProduct(self,rhs):
-        return matrix(np.cross(np.transpose(self.__m),np.transpose(rhs.__m))).transpose()
+        return matrix(np.cross(self.__m[:,0],rhs.__m[:,0]).reshape(-1,1))
 
     def determinant(self):
         return np.linalg.det(self.__m)
@@ -46,21 +51,49 @@ class matrix:
     def inverse(self):
         return matrix(np.linalg.inv(self.__m))
 
+    # Fused product of a chain such as M*T*P, evaluated right to left so that a trailing
+    # column vector turns every step into a matrix-vector product
+    @staticmethod
+    def chain(*factors):
+        result = factors[-1].__m
+        for factor in reversed(factors[:-1]):
+            result = np.dot(factor.__m,result)
+        return matrix(result)
+
     def __neg__(self):
-        return matrix(np.negative(self.__m))
+        return matrix(-self.__m)
 
     def __eq__(self,rhs):
         return np.array_equal(self.__m,rhs.__m)
 
     def __add__(self,rhs):
-        return matrix(np.add(self.__m,rhs.__m))
+        return matrix(self.__m+rhs.__m)
 
     def __sub__(self,rhs):
-        return matrix(np.subtract(self.__m,rhs.__m))
+        return matrix(self.__m-rhs.__m)
 
     def __mul__(self,rhs):
         return matrix(np.dot(self.__m,rhs.__m))
 
+    def __iadd__(self,rhs):
+        if np.can_cast(rhs.__m.dtype,self.__m.dtype):
+            self.__m += rhs.__m
+        else:
+            self.__m = self.__m+rhs.__m
+        return self
+
+    def __isub__(self,rhs):
+        if np.can_cast(rhs.__m.dtype,self.__m.dtype):
+            self.__m -= rhs.__m
+        else:
+            self.__m = self.__m-rhs.__m
+        return self
+
+    def __imul__(self,rhs):
+        self.__m = np.dot(self.__m,rhs.__m)
+        self.__c = self.__m.shape[1]
+        return self
+
     def removeRow(self,r):
         return matrix(np.delete(self.__m,r,0))
 
@@ -80,6 +113,6 @@ class matrix:
         outStr = ""
         for i in range(self.__r):
             for j in range(self.__c):
-                outStr += str("%16.6f" % (self.__m[i][j]))
+                outStr += str("%16.6f" % (self.__m[i,j]))
             outStr += "\n"
-        return outStr
\ No newline at end of file
+        return outStr
@@ -0,0 +1,200 @@
+'''
+Module Name: meshFile
+
+Purpose: A compact versioned binary file format for mesh arrays. A file holds a header, a table of named arrays and
+the raw array data aligned to 64 bytes, so that every array can be opened with numpy.memmap without copying. The
+header stores a content hash of the parameters which generated the mesh, which lets render workers share meshes
+through a directory: an instance of meshFile is an on disk tessellation cache with the interface of tessellationCache.
+
+Parameters: directory
+directory: The directory holding the cached tessellation files, created if it does not exist
+'''
+
+import hashlib
+import os
+import struct
+import tempfile
+import numpy as np
+from tessellationCache import tessellationCache
+
+
+class meshFile:
+
+    MAGIC = b'PMESH\0\0\0'
+    VERSION = 1
+    ALIGNMENT = 64
+    HEADER = struct.Struct('<8sII32s')  # Magic, version, number of arrays, content hash
+    ENTRY = struct.Struct('<16s8sII3QQ')  # Name, dtype, number of dimensions, padding, shape, data offset
+    TESSELLATION = ('points', 'normals', 'faces')
+
+    def __init__(self, directory):
+        self.__directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.__hits = 0
+        self.__misses = 0
+
+    '''
+    Purpose: To write named arrays to a mesh file
+
+    Parameters: (fileName, arrays, contentHash)
+    fileName: The file to write. It is replaced atomically, so readers never see a partly written file.
+    arrays: A dictionary of at most 3 dimensional arrays keyed by names of up to 16 ASCII characters
+    contentHash: The 32 byte digest from getHash of the parameters the arrays were generated from
+
+    Output: N/A
+    '''
+    @staticmethod
+    def write(fileName, arrays, contentHash=bytes(32)):
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        offset = meshFile.__align(meshFile.HEADER.size + meshFile.ENTRY.size * len(arrays))
+        entries = []
+        for name, array in arrays.items():
+            if array.ndim > 3:
+                raise ValueError("Mesh arrays have at most 3 dimensions")
+            shape = array.shape + (0,) * (3 - array.ndim)
+            entries.append(meshFile.ENTRY.pack(name.encode('ascii'), array.dtype.str.encode('ascii'), array.ndim, 0, *shape, offset))
+            offset = meshFile.__align(offset + array.nbytes)
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fileName)))
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                stream.write(meshFile.HEADER.pack(meshFile.MAGIC, meshFile.VERSION, len(arrays), contentHash))
+                stream.write(b''.join(entries))
+                for array in arrays.values():
+                    stream.write(bytes(meshFile.__align(stream.tell()) - stream.tell()))
+                    stream.write(array.tobytes())
+            os.replace(temporary, fileName)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    '''
+    Purpose: To open the arrays of a mesh file as memory maps, so loading does not copy or parse the data
+
+    Parameters: (fileName)
+    fileName: The mesh file
+
+    Output: An (arrays, contentHash) pair with a dictionary of read only arrays and the stored 32 byte digest
+    '''
+    @staticmethod
+    def read(fileName):
+        with open(fileName, 'rb') as stream:
+            count, contentHash = meshFile.__readHeader(stream)
+            table = stream.read(meshFile.ENTRY.size * count)
+        arrays = {}
+        for index in range(count):
+            name, dtype, ndim, _, s0, s1, s2, offset = meshFile.ENTRY.unpack_from(table, index * meshFile.ENTRY.size)
+            shape = (s0, s1, s2)[:ndim]
+            dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+            if 0 in shape:
+                # Zero length arrays cannot be mapped
+                array = np.empty(shape, dtype=dtype)
+                array.flags.writeable = False
+            else:
+                array = np.memmap(fileName, dtype=dtype, mode='r', offset=offset, shape=shape)
+            arrays[name.rstrip(b'\0').decode('ascii')] = array
+        return arrays, contentHash
+
+    '''
+    Purpose: To read only the content hash of a mesh file, e.g. to check whether it is stale before loading it
+
+    Parameters: (fileName)
+    fileName: The mesh file
+
+    Output: The stored 32 byte digest
+    '''
+    @staticmethod
+    def readHash(fileName):
+        with open(fileName, 'rb') as stream:
+            return meshFile.__readHeader(stream)[1]
+
+    @staticmethod
+    def __readHeader(stream):
+        header = stream.read(meshFile.HEADER.size)
+        if len(header) < meshFile.HEADER.size:
+            raise ValueError("Not a mesh file")
+        magic, version, count, contentHash = meshFile.HEADER.unpack(header)
+        if magic != meshFile.MAGIC:
+            raise ValueError("Not a mesh file")
+        if version != meshFile.VERSION:
+            raise ValueError("Unsupported mesh file version " + str(version))
+        return count, contentHash
+
+    @staticmethod
+    def __align(offset):
+        return -(-offset // meshFile.ALIGNMENT) * meshFile.ALIGNMENT
+
+    '''
+    Purpose: To hash the parameters a mesh was generated from. Numbers, strings, classes, nested tuples/lists and numpy
+    arrays are hashed by value, so equal parameters give the same digest in every process.
+
+    Parameters: (*parameters)
+    parameters: The generating parameters
+
+    Output: A 32 byte SHA-256 digest
+    '''
+    @staticmethod
+    def getHash(*parameters):
+        digest = hashlib.sha256()
+        digest.update(b'%d' % meshFile.VERSION)
+        meshFile.__update(digest, parameters)
+        return digest.digest()
+
+    @staticmethod
+    def __update(digest, value):
+        if isinstance(value, (tuple, list)):
+            digest.update(b'(%d' % len(value))
+            for item in value:
+                meshFile.__update(digest, item)
+            digest.update(b')')
+        elif isinstance(value, np.ndarray):
+            digest.update(repr((value.dtype.str, value.shape)).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, type):
+            digest.update((value.__module__ + '.' + value.__qualname__).encode())
+        elif hasattr(value, 'getArray'):
+            meshFile.__update(digest, value.getArray())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b';')
+
+    @staticmethod
+    def getObjectHash(object):
+        if hasattr(object, 'getPrototype'):
+            # Instanced objects are generated from their prototype and the per instance transforms and colors
+            return meshFile.getHash(meshFile.getObjectHash(object.getPrototype()), object.getTransforms(),
+                                    np.asarray(object.getInstanceColors()))
+        return meshFile.getHash(tessellationCache.getKey(object))
+
+    '''
+    Purpose: To return the tessellation of an object from the directory, tessellating and storing it on a miss
+
+    Parameters: object: A parametricObject
+
+    Output: The (points, normals, faces) triple of parametricObject.getTessellation(). The arrays are read only.
+    '''
+    def get(self, object):
+        contentHash = self.getObjectHash(object)
+        fileName = os.path.join(self.__directory, contentHash.hex() + '.mesh')
+        if os.path.exists(fileName):
+            arrays, stored = self.read(fileName)
+            if stored == contentHash:
+                self.__hits += 1
+                return tuple(arrays[name] for name in self.TESSELLATION)
+        self.__misses += 1
+        entry = object.getTessellation()
+        self.write(fileName, dict(zip(self.TESSELLATION, entry)), contentHash)
+        for array in entry:
+            array.flags.writeable = False
+        return entry
+
+    def getDirectory(self):
+        return self.__directory
+
+    def getHits(self):
+        return self.__hits
+
+    def getMisses(self):
+        return self.__misses
+
+    def getStats(self):
+        return {'hits': self.__hits, 'misses': self.__misses}
@@ -3,8 +3,9 @@ from matrix import matrix
 
 class object:
 
-    def __init__(self,T=matrix(np.identity(4)),color=(255,255,255),reflectance=(0.2,0.4,0.4,1.0)):
-        self.__T = T
+    def __init__(self,T=None,color=(255,255,255),reflectance=(0.2,0.4,0.4,1.0)):
+        # A fresh identity per object, so that in-place operators on one object's T never move another object
+        self.__T = T if T is not None else matrix(np.identity(4))
         self.__color = color
         self.__reflectance = reflectance
 
@@ -0,0 +1,100 @@
+'''
+Module Name: parameterGrid
+
+Purpose: A shared service which produces the u&v parameter grids used for tessellation and caches the sin/cos tables
+of each (range, delta) pair, so that objects with the same grids never re-evaluate the same trigonometric values
+
+Parameters: maxEntries
+maxEntries: Number of (range, delta) tables kept before the least recently used one is dropped
+'''
+
+from collections import OrderedDict
+import numpy as np
+
+
+class parameterGrid:
+
+    def __init__(self, maxEntries=256):
+        self.__maxEntries = maxEntries
+        self.__tables = OrderedDict()  # (start, end, delta) -> {'values', 'sin', 'cos'}
+        self.__lookup = {}  # id of a grid array handed out -> (array, sin table, cos table)
+
+    '''
+    Purpose: To compute the parameter values start, start+delta, ... up to end by exact index based stepping
+
+    Parameters: (valueRange, delta)
+    valueRange: The (start, end) pair of the parameter
+    delta: The parameter step
+
+    Output: A read only 1-D numpy array of the parameter values
+    '''
+    def getValues(self, valueRange, delta):
+        return self.__getTable(valueRange, delta)['values']
+
+    '''
+    Purpose: To produce a broadcastable u&v grid for tessellation
+
+    Parameters: (uRange, vRange, uvDelta): The object's parameter ranges and steps
+
+    Output: A (U, V) pair shaped (nu,1) and (1,nv), which broadcast to the full grid with U varying along rows
+    '''
+    def getGrid(self, uRange, vRange, uvDelta):
+        return self.__getTable(uRange, uvDelta[0])['column'], self.__getTable(vRange, uvDelta[1])['row']
+
+    '''
+    Purpose: Drop-in replacements for np.sin and np.cos which return the cached table when given a grid array
+    produced by this service
+
+    Parameters: x: A scalar or numpy array
+
+    Output: sin(x) or cos(x)
+    '''
+    def sin(self, x):
+        entry = self.__lookup.get(id(x))
+        if entry is not None and entry[0] is x:
+            return entry[1]
+        return np.sin(x)
+
+    def cos(self, x):
+        entry = self.__lookup.get(id(x))
+        if entry is not None and entry[0] is x:
+            return entry[2]
+        return np.cos(x)
+
+    def clear(self):
+        self.__tables.clear()
+        self.__lookup.clear()
+
+    def getNumberOfTables(self):
+        return len(self.__tables)
+
+    def __getTable(self, valueRange, delta):
+        EPSILON = 1e-9  # Tolerance in steps, so that it scales with delta
+        key = (float(valueRange[0]), float(valueRange[1]), float(delta))
+        table = self.__tables.get(key)
+        if table is not None:
+            self.__tables.move_to_end(key)
+            return table
+        start, end, delta = key
+        # Steps while the next value does not pass end by more than EPSILON steps, without accumulating rounding errors
+        steps = int(np.floor((end - start) / delta + EPSILON)) if delta > 0.0 else 0
+        values = start + np.arange(max(steps, 0) + 1) * delta
+        sinValues = np.sin(values)
+        cosValues = np.cos(values)
+        # The tables are shared by every tessellation, so they and all views of them are read only
+        for array in (values, sinValues, cosValues):
+            array.flags.writeable = False
+        table = {'values': values, 'sin': sinValues, 'cos': cosValues}
+        for name, shape in (('column', (-1, 1)), ('row', (1, -1))):
+            table[name] = values.reshape(shape)
+            self.__lookup[id(table[name])] = (table[name], sinValues.reshape(shape), cosValues.reshape(shape))
+        self.__lookup[id(values)] = (values, sinValues, cosValues)
+        self.__tables[key] = table
+        while len(self.__tables) > self.__maxEntries:
+            key, dropped = self.__tables.popitem(last=False)
+            for name in ('values', 'column', 'row'):
+                del self.__lookup[id(dropped[name])]
+        return table
+
+
+sharedParameterGrid = parameterGrid()
@@ -15,31 +15,85 @@ from math import *
 import numpy as np
 from matrix import matrix
 from parametricObject import parametricObject
+from parameterGrid import sharedParameterGrid
 
 class parametricCircle(parametricObject):
-    def __init__(self,T=matrix(np.identity(4)), radius=10.0, color=(0,255,255), reflectance=(0.2, 0.4, 0.4, 1.0),uRange=(0.0,1.0),vRange=(0.0,2.0*pi),uvDelta=(pi/18.0,pi/18.0)):
+    def __init__(self,T=None, radius=10.0, color=(0,255,255), reflectance=(0.2, 0.4, 0.4, 1.0),uRange=(0.0,1.0),vRange=(0.0,2.0*pi),uvDelta=(pi/18.0,pi/18.0)):
         super().__init__(T,color,reflectance,uRange,vRange,uvDelta)
         self.__radius = radius
+        self.setBackFaceCulling(False)  # Open surface: its inside can be seen
 
     '''
     Purpose: To compute a position matrix for the points in the 2-d space
 
-    Parameters: u, v: Respective points in the 2-D space
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
 
-    Output: A 4x1 position vector (matrix) for the points on the circle's surface
+    Output: The x, y, z coordinates of the points on the circle's surface
     '''
-    def getPoint(self,u,v):
-        P = matrix(np.ones((4,1)))
-        P.set(0,0,self.__radius*u*cos(v))
-        P.set(1,0,self.__radius*u*sin(v))
-        P.set(2,0,0)
-        return P
+    def evaluateSurface(self,u,v):
+        return (self.__radius*u*sharedParameterGrid.cos(v),
+                self.__radius*u*sharedParameterGrid.sin(v),
+                0.0)
+
+    '''
+    Purpose: To compute the outward normal direction of the circle's surface
+
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
+
+    Output: The x, y, z components of the (unnormalized) normals at the points
+    '''
+    def evaluateNormal(self,u,v):
+        return (0.0,
+                0.0,
+                1.0)
+
+    '''
+    Purpose: To compute an axis aligned box which contains the circle's surface over its u&v ranges
+
+    Parameters: N/A
+
+    Output: The (low, high) corners of the box in object coordinates as numpy arrays
+    '''
+    def getBoundingBox(self):
+        r = np.abs(self.__radius*np.array(self.getURange())).max()
+        return np.array([-r,-r,0.0]),np.array([r,r,0.0])
+
+    '''
+    Purpose: To intersect a batch of rays with the circle's surface, see parametricObject.getRayHits
+
+    Parameters: O, D: (R,3) numpy arrays of ray origins and directions in object coordinates
+
+    Output: An (R,K) array of ray parameters of the intersections, nan where there is none
+    '''
+    def intersectRays(self,O,D):
+        with np.errstate(divide='ignore',invalid='ignore'):
+            return (-O[:,2]/D[:,2]).reshape(-1,1)
+
+    '''
+    Purpose: To recover the u&v parameters of points on the circle's surface
+
+    Parameters: P: An (N,3) numpy array of points on the surface in object coordinates
+
+    Output: A sequence of (u, v) candidate pairs, one for every way the parameterization reaches the points
+    '''
+    def getSurfaceParameters(self,P):
+        P = P/self.__radius
+        u = np.hypot(P[:,0],P[:,1])
+        v = np.arctan2(P[:,1],P[:,0])
+        # (u,v) and (-u,v+pi) describe the same point
+        return ((u,v),(-u,v+pi))
+
+    def getParameterPeriods(self):
+        return (None,2.0*pi)
 
     '''
     Purpose: These methods are the setters and getters for the class parameters radius 
 
     Parameters: radius: Float value for the circle's target radius 
     '''
+    def getShapeParameters(self):
+        return (self.__radius,)
+
     def setRadius(self,radius):
         self.__radius = radius
 
@@ -15,33 +15,91 @@ from math import *
 import numpy as np
 from matrix import matrix
 from parametricObject import parametricObject
+from parameterGrid import sharedParameterGrid
 
 
 class parametricCone(parametricObject):
-    def __init__(self, T=matrix(np.identity(4)), height=10.0,  radius=10.0, color=(0, 0, 255), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 2*pi), uvDelta=(pi/18.0, pi/18.0)):
+    def __init__(self, T=None, height=10.0,  radius=10.0, color=(0, 0, 255), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 2*pi), uvDelta=(pi/18.0, pi/18.0)):
         super().__init__(T, color, reflectance, uRange, vRange, uvDelta)
         self.__radius = radius
         self.__height = height
+        self.setBackFaceCulling(False)  # Open surface: its inside can be seen
 
     '''
     Purpose: To compute a position matrix for the points in the 2-d space
 
-    Parameters: u, v: Respective points in the 2-D space
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
 
-    Output: A 4x1 position vector (matrix) for the points on the cone's surface
+    Output: The x, y, z coordinates of the points on the cone's surface
     '''
-    def getPoint(self, u, v):
-        P = matrix(np.ones((4, 1)))
-        P.set(0, 0, self.__radius * (1 - u) * sin(v))
-        P.set(1, 0, self.__radius * (1 - u) * cos(v))
-        P.set(2, 0, self.__height * u)
-        return P
+    def evaluateSurface(self, u, v):
+        return (self.__radius * (1 - u) * sharedParameterGrid.sin(v),
+                self.__radius * (1 - u) * sharedParameterGrid.cos(v),
+                self.__height * u)
+
+    '''
+    Purpose: To compute the outward normal direction of the cone's surface
+
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
+
+    Output: The x, y, z components of the (unnormalized) normals at the points
+    '''
+    def evaluateNormal(self, u, v):
+        return (self.__height * sharedParameterGrid.sin(v),
+                self.__height * sharedParameterGrid.cos(v),
+                self.__radius)
+
+    '''
+    Purpose: To compute an axis aligned box which contains the cone's surface over its u&v ranges
+
+    Parameters: N/A
+
+    Output: The (low, high) corners of the box in object coordinates as numpy arrays
+    '''
+    def getBoundingBox(self):
+        u = np.array(self.getURange())
+        r = np.abs(self.__radius * (1 - u)).max()
+        z = self.__height * u
+        return np.array([-r, -r, z.min()]), np.array([r, r, z.max()])
+
+    '''
+    Purpose: To intersect a batch of rays with the cone's surface, see parametricObject.getRayHits
+
+    Parameters: O, D: (R,3) numpy arrays of ray origins and directions in object coordinates
+
+    Output: An (R,K) array of ray parameters of the intersections, nan where there is none
+    '''
+    def intersectRays(self, O, D):
+        # x^2 + y^2 = (radius - slope*z)^2 with the apex at z = height
+        slope = self.__radius / self.__height
+        ring = self.__radius - slope * O[:, 2]
+        return self.solveQuadratic(D[:, 0]**2 + D[:, 1]**2 - (slope * D[:, 2])**2,
+                                   2.0 * (O[:, 0]*D[:, 0] + O[:, 1]*D[:, 1] + slope * ring * D[:, 2]),
+                                   O[:, 0]**2 + O[:, 1]**2 - ring**2)
+
+    '''
+    Purpose: To recover the u&v parameters of points on the cone's surface
+
+    Parameters: P: An (N,3) numpy array of points on the surface in object coordinates
+
+    Output: A sequence of (u, v) candidate pairs, one for every way the parameterization reaches the points
+    '''
+    def getSurfaceParameters(self, P):
+        u = P[:, 2] / self.__height
+        side = np.sign(self.__radius * (1 - u))
+        return ((u, np.arctan2(side * P[:, 0], side * P[:, 1])),)
+
+    def getParameterPeriods(self):
+        return (None, 2.0*pi)
 
     '''
     Purpose: These methods are the setters and getters for the class parameters radius and height
 
     Parameters: radius, height: Respective float values for the cone's target radius and height
     '''
+    def getShapeParameters(self):
+        return (self.__height, self.__radius)
+
     def setRadius(self, radius):
         self.__radius = radius
 
@@ -15,33 +15,84 @@ from math import *
 import numpy as np
 from matrix import matrix
 from parametricObject import parametricObject
+from parameterGrid import sharedParameterGrid
 
 
 class parametricCylinder(parametricObject):
-    def __init__(self, T=matrix(np.identity(4)), height = 10.0, radius=10.0, color=(255, 0, 255), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 2*pi), uvDelta=(0.0, 0.0)):
+    def __init__(self, T=None, height = 10.0, radius=10.0, color=(255, 0, 255), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 2*pi), uvDelta=(0.0, 0.0)):
         super().__init__(T, color, reflectance, uRange, vRange, uvDelta)
         self.__radius = radius
         self.__height = height
+        self.setBackFaceCulling(False)  # Open surface: its inside can be seen
 
     '''
     Purpose: To compute a position matrix for the points in the 2-d space
 
-    Parameters: u, v: Respective points in the 2-D space
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
 
-    Output: A 4x1 position vector (matrix) for the points on the cylinder's surface
+    Output: The x, y, z coordinates of the points on the cylinder's surface
     '''
-    def getPoint(self, u, v):
-        P = matrix(np.ones((4, 1)))
-        P.set(0, 0, self.__radius*sin(v))
-        P.set(1, 0, self.__radius*cos(v))
-        P.set(2, 0, self.__height*u)
-        return P
+    def evaluateSurface(self, u, v):
+        return (self.__radius*sharedParameterGrid.sin(v),
+                self.__radius*sharedParameterGrid.cos(v),
+                self.__height*u)
+
+    '''
+    Purpose: To compute the outward normal direction of the cylinder's surface
+
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
+
+    Output: The x, y, z components of the (unnormalized) normals at the points
+    '''
+    def evaluateNormal(self, u, v):
+        return (sharedParameterGrid.sin(v),
+                sharedParameterGrid.cos(v),
+                0.0)
+
+    '''
+    Purpose: To compute an axis aligned box which contains the cylinder's surface over its u&v ranges
+
+    Parameters: N/A
+
+    Output: The (low, high) corners of the box in object coordinates as numpy arrays
+    '''
+    def getBoundingBox(self):
+        r = abs(self.__radius)
+        z = self.__height * np.array(self.getURange())
+        return np.array([-r, -r, z.min()]), np.array([r, r, z.max()])
+
+    '''
+    Purpose: To intersect a batch of rays with the cylinder's surface, see parametricObject.getRayHits
+
+    Parameters: O, D: (R,3) numpy arrays of ray origins and directions in object coordinates
+
+    Output: An (R,K) array of ray parameters of the intersections, nan where there is none
+    '''
+    def intersectRays(self, O, D):
+        return self.solveQuadratic(D[:, 0]**2 + D[:, 1]**2, 2.0 * (O[:, 0]*D[:, 0] + O[:, 1]*D[:, 1]),
+                                   O[:, 0]**2 + O[:, 1]**2 - self.__radius**2)
+
+    '''
+    Purpose: To recover the u&v parameters of points on the cylinder's surface
+
+    Parameters: P: An (N,3) numpy array of points on the surface in object coordinates
+
+    Output: A sequence of (u, v) candidate pairs, one for every way the parameterization reaches the points
+    '''
+    def getSurfaceParameters(self, P):
+        return ((P[:, 2] / self.__height, np.arctan2(P[:, 0] / self.__radius, P[:, 1] / self.__radius)),)
+
+    def getParameterPeriods(self):
+        return (None, 2.0*pi)
 
     '''
     Purpose: These methods are the setters and getters for the class parameters radius and height
 
     Parameters: radius, height: Respective float values for the cylinder's target radius and height
     '''
+    def getShapeParameters(self):
+        return (self.__height, self.__radius)
+
     def setRadius(self, radius):
         self.__radius = radius
 
@@ -1,14 +1,243 @@
 import numpy as np
 from matrix import matrix
+from meshFile import meshFile
 from object import object
+from parameterGrid import sharedParameterGrid
+from renderStats import sharedRenderStats
 
 class parametricObject(object):
 
-    def __init__(self,T=matrix(np.identity(4)),color=(0,0,0),reflectance=(0.0,0.0,0.0,0.0),uRange=(0.0,0.0),vRange=(0.0,0.0),uvDelta=(0.0,0.0)):
+    def __init__(self,T=None,color=(0,0,0),reflectance=(0.0,0.0,0.0,0.0),uRange=(0.0,0.0),vRange=(0.0,0.0),uvDelta=(0.0,0.0)):
         super().__init__(T,color,reflectance)
         self.__uRange = uRange
         self.__vRange = vRange
         self.__uvDelta = uvDelta
+        self.__backFaceCulling = True
+
+    '''
+    Purpose: To compute the surface points for a whole set of parameters in one vectorized pass
+
+    Parameters: U, V: Scalars or numpy arrays of u and v parameters (broadcast against each other)
+
+    Output: An (N,4) numpy array of homogeneous points, one row per (u,v) pair
+    '''
+    def getPoints(self,U,V):
+        U = np.asarray(U,dtype=float)
+        V = np.asarray(V,dtype=float)
+        # The formula is applied to U and V as given so that broadcast grids only evaluate each row/column once
+        P = np.ones(np.broadcast_shapes(U.shape,V.shape)+(4,))
+        x,y,z = self.evaluateSurface(U,V)
+        P[...,0] = x
+        P[...,1] = y
+        P[...,2] = z
+        P = P.reshape(-1,4)
+        sharedRenderStats.count('verticesEvaluated',P.shape[0])
+        return P
+
+    def getPoint(self,u,v):
+        return matrix(self.getPoints(u,v).reshape(4,1))
+
+    '''
+    Purpose: To tessellate the object's surface over its u&v ranges into an indexed quad mesh in object coordinates
+
+    Parameters: N/A
+
+    Output: A (points, normals, faces) triple: (N,4) grid node points, (N,4) unit normals and (F,4) vertex indices of the quads
+    '''
+    def getTessellation(self):
+        U,V = sharedParameterGrid.getGrid(self.__uRange,self.__vRange,self.__uvDelta)
+        nu = U.shape[0]-1
+        nv = V.shape[1]-1
+        if nu < 1 or nv < 1:
+            return np.empty((0,4)),np.empty((0,4)),np.empty((0,4),dtype=int)
+        # Corners of quad (i,j) in the order (u,v), (u,v+dv), (u+du,v+dv), (u+du,v)
+        row = np.arange(nu).reshape(nu,1)*(nv+1)
+        col = np.arange(nv).reshape(1,nv)
+        base = (row+col).ravel()
+        faces = np.stack((base,base+1,base+nv+2,base+nv+1),axis=1)
+        return self.getPoints(U,V),self.getNormals(U,V),faces
+
+    '''
+    Purpose: To write the object's tessellation to a mesh file together with the hash of its generating parameters
+
+    Parameters: fileName: The mesh file to write
+
+    Output: N/A
+    '''
+    def saveTessellation(self,fileName):
+        meshFile.write(fileName,dict(zip(meshFile.TESSELLATION,self.getTessellation())),meshFile.getObjectHash(self))
+
+    '''
+    Purpose: To load the object's tessellation from a mesh file written by saveTessellation, memory mapped
+
+    Parameters: fileName: The mesh file to read
+
+    Output: The (points, normals, faces) triple of getTessellation as read only arrays. A ValueError is raised if the
+    file was generated from different parameters.
+    '''
+    def loadTessellation(self,fileName):
+        arrays,contentHash = meshFile.read(fileName)
+        if contentHash != meshFile.getObjectHash(self):
+            raise ValueError("The mesh file " + fileName + " was generated from different parameters")
+        return tuple(arrays[name] for name in meshFile.TESSELLATION)
+
+
+    '''
+    Purpose: To compute the unit outward surface normals for a whole set of parameters in one vectorized pass
+
+    Parameters: U, V: Scalars or numpy arrays of u and v parameters (broadcast against each other)
+
+    Output: An (N,4) numpy array of homogeneous normal vectors (w = 0), one row per (u,v) pair
+    '''
+    def getNormals(self,U,V):
+        U = np.asarray(U,dtype=float)
+        V = np.asarray(V,dtype=float)
+        N = np.zeros(np.broadcast_shapes(U.shape,V.shape)+(4,))
+        x,y,z = self.evaluateNormal(U,V)
+        N[...,0] = x
+        N[...,1] = y
+        N[...,2] = z
+        N = N.reshape(-1,4)
+        length = np.linalg.norm(N[:,0:3],axis=1,keepdims=True)
+        return N/np.where(length > 0.0,length,1.0)
+
+    '''
+    Purpose: To list the corners of the object space bounding box
+
+    Parameters: N/A
+
+    Output: An (8,4) numpy array of homogeneous corner points, corner i taking the high x, y and z values for bits 0, 1
+    and 2 of i
+    '''
+    def getBoxCorners(self):
+        low,high = self.getBoundingBox()
+        corners = np.ones((8,4))
+        bits = np.arange(8)[:,None] >> np.arange(3) & 1
+        corners[:,0:3] = np.where(bits == 1,np.asarray(high,dtype=float),np.asarray(low,dtype=float))
+        return corners
+
+    def getWorldCorners(self,T=None):
+        return (self.getBoxCorners() @ (T if T is not None else self.getT()).getArray().T)[:,0:3]
+
+    '''
+    Purpose: To compute the world space axis aligned box around the transformed object space bounding box
+
+    Parameters: T: Optional world transformation used instead of the object's own T
+
+    Output: A (low, high) pair of numpy arrays of 3 world coordinates
+    '''
+    def getWorldBox(self,T=None):
+        corners = self.getWorldCorners(T)
+        return corners.min(axis=0),corners.max(axis=0)
+
+    '''
+    Purpose: To compute a bounding sphere of the object in world coordinates from its object space bounding box and T
+
+    Parameters: T: Optional world transformation used instead of the object's own T
+
+    Output: A (center, radius) pair where center is a numpy array of 3 world coordinates
+    '''
+    def getBoundingSphere(self,T=None):
+        corners = self.getWorldCorners(T)
+        center = corners.mean(axis=0)
+        return center,float(np.linalg.norm(corners-center,axis=1).max())
+
+    '''
+    Purpose: To find where a batch of rays first meets the object's surface over its u&v ranges
+
+    Parameters: (O, D, tMin, tMax)
+    O, D: (R,3) numpy arrays of ray origins and directions in object coordinates
+    tMin, tMax: Range of the ray parameter t in which hits are accepted
+
+    Output: A (t, u, v) triple of (R,) arrays: the ray parameter of the nearest hit (inf where a ray misses) and the
+    surface parameters of the hit
+    '''
+    def getRayHits(self,O,D,tMin=0.0,tMax=np.inf):
+        t = self.intersectRays(O,D)
+        R,K = t.shape
+        with np.errstate(invalid='ignore'):
+            valid = (t >= tMin) & (t <= tMax)
+        P = (O[:,None,:]+np.where(valid,t,0.0)[:,:,None]*D[:,None,:]).reshape(-1,3)
+        u,v,inside = self.__matchParameters(P)
+        valid &= inside.reshape(R,K)
+        t = np.where(valid,t,np.inf)
+        nearest = np.argmin(t,axis=1)
+        hit = np.arange(R)*K+nearest
+        return t[np.arange(R),nearest],u[hit],v[hit]
+
+    def __matchParameters(self,P):
+        # A point can have several (u,v) parameterizations; it is on the surface when one of them lies in the ranges
+        EPS = 1e-9
+        u = np.zeros(P.shape[0])
+        v = np.zeros(P.shape[0])
+        found = np.zeros(P.shape[0],dtype=bool)
+        periods = self.getParameterPeriods()
+        for candidate in self.getSurfaceParameters(P):
+            inside = ~found
+            values = []
+            for value, (start, end), period in zip(candidate,(self.__uRange,self.__vRange),periods):
+                value = np.broadcast_to(np.asarray(value,dtype=float),found.shape)
+                low,high = min(start,end),max(start,end)
+                if period is not None:
+                    if high-low >= period-EPS:
+                        values.append(value)
+                        continue
+                    value = low+np.mod(value-low,period)
+                    # Values just below the start of the range wrap to the top of the period
+                    value = np.where(value > low+period-EPS,low,value)
+                inside &= (value >= low-EPS) & (value <= high+EPS)
+                values.append(value)
+            u = np.where(inside,values[0],u)
+            v = np.where(inside,values[1],v)
+            found |= inside
+        return u,v,found
+
+    '''
+    Purpose: To solve a batch of quadratic equations a*t^2 + b*t + c = 0, used by the ray intersections
+
+    Parameters: (a, b, c): Numpy arrays of coefficients
+
+    Output: An (R,2) array of real roots, nan where a root does not exist
+    '''
+    @staticmethod
+    def solveQuadratic(a,b,c):
+        with np.errstate(divide='ignore',invalid='ignore'):
+            discriminant = b*b-4.0*a*c
+            root = np.sqrt(np.where(discriminant >= 0.0,discriminant,np.nan))
+            # Numerically stable roots, and the linear solution when a vanishes
+            q = -0.5*(b+np.copysign(root,b))
+            linear = np.abs(a) <= 1e-12*np.abs(b)
+            t0 = np.where(linear,-c/b,q/a)
+            t1 = np.where(linear,np.nan,c/q)
+        return np.stack((t0,t1),axis=1)
+
+    def getShapeParameters(self):
+        # Part of the tessellation cache key and mesh file hash, so every shape has to list all of its dimensions
+        raise NotImplementedError
+
+    def intersectRays(self,O,D):
+        raise NotImplementedError
+
+    def getSurfaceParameters(self,P):
+        raise NotImplementedError
+
+    def getParameterPeriods(self):
+        return (None,None)
+
+    def getBoundingBox(self):
+        raise NotImplementedError
+
+    def evaluateSurface(self,u,v):
+        raise NotImplementedError
+
+    def evaluateNormal(self,u,v):
+        raise NotImplementedError
+
+    def getBackFaceCulling(self):
+        return self.__backFaceCulling
+
+    def setBackFaceCulling(self,backFaceCulling):
+        self.__backFaceCulling = backFaceCulling
 
     def getURange(self):
         return self.__uRange
@@ -26,4 +255,4 @@ class parametricObject(object):
         self.__vRange = vRange
 
     def setUVDelta(self,uvDelta):
-        self.__uvDelta = uvDelta
\ No newline at end of file
+        self.__uvDelta = uvDelta
@@ -18,30 +18,77 @@ from parametricObject import parametricObject
 
 
 class parametricPlane(parametricObject):
-    def __init__(self, T=matrix(np.identity(4)), width=10.0, height=10.0, color=(255, 255, 0), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 1.0), uvDelta=(1.0/10.0, 1.0/10.0)):
+    def __init__(self, T=None, width=10.0, height=10.0, color=(255, 255, 0), reflectance=(0.2, 0.4, 0.4, 1.0), uRange=(0.0, 1.0), vRange=(0.0, 1.0), uvDelta=(1.0/10.0, 1.0/10.0)):
         super().__init__(T, color, reflectance, uRange, vRange, uvDelta)
         self.__width = width
         self.__height = height
+        self.setBackFaceCulling(False)  # Open surface: its inside can be seen
 
     '''
     Purpose: To compute a position matrix for the points in the 2-d space
 
-    Parameters: u, v: Respective points in the 2-D space
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
 
-    Output: A 4x1 position vector (matrix) for the points on the plane's surface
+    Output: The x, y, z coordinates of the points on the plane's surface
     '''
-    def getPoint(self, u, v):
-        P = matrix(np.ones((4, 1)))
-        P.set(0, 0, self.__width * u)
-        P.set(1, 0, self.__height * v)
-        P.set(2, 0, 0)
-        return P
+    def evaluateSurface(self, u, v):
+        return (self.__width * u,
+                self.__height * v,
+                0.0)
+
+    '''
+    Purpose: To compute the outward normal direction of the plane's surface
+
+    Parameters: u, v: Scalars or equally shaped numpy arrays of points in the 2-D space
+
+    Output: The x, y, z components of the (unnormalized) normals at the points
+    '''
+    def evaluateNormal(self, u, v):
+        return (0.0,
+                0.0,
+                1.0)
+
+    '''
+    Purpose: To compute an axis aligned box which contains the plane's surface over its u&v ranges
+
+    Parameters: N/A
+
+    Output: The (low, high) corners of the box in object coordinates as numpy arrays
+    '''
+    def getBoundingBox(self):
+        x = self.__width * np.array(self.getURange())
+        y = self.__height * np.array(self.getVRange())
+        return np.array([x.min(), y.min(), 0.0]), np.array([x.max(), y.max(), 0.0])
+
+    '''
+    Purpose: To intersect a batch of rays with the plane's surface, see parametricObject.getRayHits
+
+    Parameters: O, D: (R,3) numpy arrays of ray origins and directions in object coordinates
+
+    Output: An (R,K) array of ray parameters of the intersections, nan where there is none
+    '''
+    def intersectRays(self, O, D):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (-O[:, 2] / D[:, 2]).reshape(-1, 1)
+
+    '''
+    Purpose: To recover the u&v parameters of points on the plane's surface
+
+    Parameters: P: An (N,3) numpy array of points on the surface in object coordinates
+
+    Output: A sequence of (u, v) candidate pairs, one for every way the parameterization reaches the points
+    '''
+    def getSurfaceParameters(self, P):
+        return ((P[:, 0] / self.__width, P[:, 1] / self.__height),)
 
     '''
     Purpose: These methods are the setters and getters for the class parameters width and height
 
     Parameters: width, height: Respective float values for the plane's target width and height
     '''
+    def getShapeParameters(self):
+        return (self.__width, self.__height)
+
     def setWidth(self, width):
         self.__width = width
 
@@ -2,19 +2,46 @@ from math import *
 import numpy as np
 from matrix import matrix
 from parametricObject import parametricObject
+from parameterGrid import sharedParameterGrid
 
 class parametricSphere(parametricObject):
 
-    def __init__(self,T=matrix(np.identity(4)),radius=10.0,color=(255,255,255),reflectance=(0.2,0.4,0.4,1.0),uRange=(0.0,pi),vRange=(0.0,2.0*pi),uvDelta=(pi/18.0,pi/18.0)):
+    def __init__(self,T=None,radius=10.0,color=(255,255,255),reflectance=(0.2,0.4,0.4,1.0),uRange=(0.0,pi),vRange=(0.0,2.0*pi),uvDelta=(pi/18.0,pi/18.0)):
         super().__init__(T,color,reflectance,uRange,vRange,uvDelta)
         self.__radius = radius
 
-    def getPoint(self,u,v):
-        P = matrix(np.ones((4,1)))
-        P.set(0,0,self.__radius*cos(v)*sin(u))
-        P.set(1,0,self.__radius*sin(v)*sin(u))
-        P.set(2,0,self.__radius*cos(u))
-        return P
+    def evaluateSurface(self,u,v):
+        sinU = sharedParameterGrid.sin(u)
+        return (self.__radius*sharedParameterGrid.cos(v)*sinU,
+                self.__radius*sharedParameterGrid.sin(v)*sinU,
+                self.__radius*sharedParameterGrid.cos(u))
+
+    def evaluateNormal(self,u,v):
+        sinU = sharedParameterGrid.sin(u)
+        return (sharedParameterGrid.cos(v)*sinU,
+                sharedParameterGrid.sin(v)*sinU,
+                sharedParameterGrid.cos(u))
+
+    def getBoundingBox(self):
+        r = abs(self.__radius)
+        return np.array([-r,-r,-r]),np.array([r,r,r])
+
+    def intersectRays(self,O,D):
+        return self.solveQuadratic(np.einsum('ij,ij->i',D,D),2.0*np.einsum('ij,ij->i',O,D),
+                                   np.einsum('ij,ij->i',O,O)-self.__radius**2)
+
+    def getSurfaceParameters(self,P):
+        P = P/self.__radius
+        u = np.arccos(np.clip(P[:,2],-1.0,1.0))
+        v = np.arctan2(P[:,1],P[:,0])
+        # (u,v) and (-u,v+pi) describe the same point
+        return ((u,v),(-u,v+pi))
+
+    def getParameterPeriods(self):
+        return (2.0*pi,2.0*pi)
+
+    def getShapeParameters(self):
+        return (self.__radius,)
 
     def setRadius(self,radius):
         self.__radius = radius
@@ -3,6 +3,8 @@ from matrix import matrix
 
 class point(matrix):
 
+    __slots__ = ()
+
     def __init__(self,x=0.0,y=0.0,z=0.0,homogeneous=True):
         if homogeneous:
             super().__init__(np.ones((4,1)))
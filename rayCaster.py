@@ -0,0 +1,149 @@
+'''
+Module Name: rayCaster
+
+Purpose: To render parametric objects by casting one primary ray per pixel and intersecting it with the closed form
+surface of each object, which gives exact silhouettes without tessellating. A bounding volume hierarchy over the
+objects' boxes selects which rays are intersected with which object. Rays are generated and intersected for
+one fixed size pixel tile at a time so that memory stays bounded, and tiles can be processed on a thread pool. Hits
+are shaded with the Phong model and the object's reflectance and written through the window's depth buffer, so
+objects without a closed form intersection (such as the torus) are drawn as shaded solid meshes in the same frame.
+
+Parameters: objectList, camera, lighting, tileSize, workers
+objectList: The parametric objects to render
+camera: The cameraMatrix the rays are cast from
+lighting: Optional shading instance with the light sources, one default light when omitted
+tileSize: Side of the square pixel tiles
+workers: Number of threads casting tiles
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+from math import pi, tan
+import numpy as np
+from boundingVolumeHierarchy import boundingVolumeHierarchy
+from parametricObject import parametricObject
+from shading import shading
+from wireMesh import wireMesh
+
+
+class rayCaster:
+
+    def __init__(self, objectList, camera, lighting=None, tileSize=64, workers=1):
+        self.__objectList = list(objectList)
+        self.__camera = camera
+        self.__lighting = lighting if lighting is not None else shading()
+        self.__tileSize = tileSize
+        self.__workers = workers
+
+    '''
+    Purpose: To render the objects into a graphics window
+
+    Parameters: window: The graphicsWindow the camera was set up for
+
+    Output: N/A
+    '''
+    def render(self, window):
+        analytic = [object for object in self.__objectList if self.isAnalytic(object)]
+        others = [object for object in self.__objectList if not self.isAnalytic(object)]
+        eye = self.__camera.getE()
+        if others:
+            mesh = wireMesh(others, self.__camera, backFaceCulling=True)
+            window.drawSolidMesh(mesh, vertexColors=self.__lighting.shadeVertices(mesh, eye))
+        if not analytic:
+            return
+        # Each object is intersected in its own coordinates: the ray origin and directions are mapped by T^-1
+        scene = [(object, np.linalg.inv(object.getT().getArray())) for object in analytic]
+        hierarchy = boundingVolumeHierarchy.fromObjects(analytic)
+        width, height = window.getWidth(), window.getHeight()
+        size = self.__tileSize
+        tiles = [(x, y, min(x + size, width), min(y + size, height)) for y in range(0, height, size) for x in range(0, width, size)]
+        if self.__workers > 1:
+            with ThreadPoolExecutor(max_workers=self.__workers) as pool:
+                list(pool.map(lambda tile: self.__renderTile(window, scene, hierarchy, tile), tiles))
+        else:
+            for tile in tiles:
+                self.__renderTile(window, scene, hierarchy, tile)
+
+    def __renderTile(self, window, scene, hierarchy, tile):
+        x0, y0, x1, y1 = tile
+        py, px = np.mgrid[y0:y1, x0:x1]
+        px = px.ravel()
+        py = py.ravel()
+        origin, directions = self.getRays(px, py, window.getWidth(), window.getHeight())
+        # The directions reach the near plane at t = 1 and the far plane at t = farPlane/nearPlane
+        tMax = self.__camera.getFp() / self.__camera.getNp()
+        nearest = np.full(px.shape[0], np.inf)
+        hitObject = np.full(px.shape[0], -1)
+        hitU = np.zeros(px.shape[0])
+        hitV = np.zeros(px.shape[0])
+        # Only the rays which reach an object's world space box are intersected with its surface
+        candidateRays, candidateObjects = hierarchy.intersectRays(origin, directions, 1.0, tMax)
+        for index in np.unique(candidateObjects):
+            object, inverse = scene[index]
+            rays = candidateRays[candidateObjects == index]
+            O = np.broadcast_to(inverse[0:3, 0:3] @ origin + inverse[0:3, 3], (rays.shape[0], 3))
+            D = directions[rays] @ inverse[0:3, 0:3].T
+            t, u, v = object.getRayHits(O, D, 1.0, tMax)
+            closer = t < nearest[rays]
+            rays = rays[closer]
+            nearest[rays] = t[closer]
+            hitObject[rays] = index
+            hitU[rays] = u[closer]
+            hitV[rays] = v[closer]
+        hit = np.isfinite(nearest)
+        if not hit.any():
+            return
+        px, py, hitObject, hitU, hitV = px[hit], py[hit], hitObject[hit], hitU[hit], hitV[hit]
+        positions = origin + nearest[hit, None] * directions[hit]
+        normals = np.empty((positions.shape[0], 3))
+        reflectance = np.empty((positions.shape[0], 4))
+        colors = np.empty((positions.shape[0], 3))
+        for index, (object, inverse) in enumerate(scene):
+            mine = hitObject == index
+            if mine.any():
+                # Object space normals map to world space by the inverse transpose of T
+                normals[mine] = object.getNormals(hitU[mine], hitV[mine])[:, 0:3] @ inverse[0:3, 0:3]
+                reflectance[mine] = object.getReflectance()
+                colors[mine] = object.getColor()
+        normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+        intensity = self.__lighting.illuminate(normals, positions, reflectance, self.__camera.getE())
+        image = self.__camera.worldToImageCoordinatesBatch(np.concatenate((positions, np.ones((positions.shape[0], 1))), axis=1))
+        window.drawFragments(px, py, image[:, 2] / image[:, 3], np.clip(colors * intensity[:, None], 0.0, 255.0).astype(np.uint8))
+
+    '''
+    Purpose: To generate the primary rays through pixel centers
+
+    Parameters: (px, py, width, height)
+    px, py: (R,) arrays of pixel coordinates
+    width, height: The window size
+
+    Output: An (origin, directions) pair: the eye position (3,) and (R,3) world space directions scaled so that t = 1
+    lies on the near plane
+    '''
+    def getRays(self, px, py, width, height):
+        camera = self.__camera
+        nearPlane = camera.getNp()
+        top = nearPlane * tan(pi/180.0 * camera.getTheta() / 2.0)
+        right = camera.getAspect() * top
+        # Inverse of the viewport mapping: pixel (0,0) is the top left corner of the near plane window
+        x = right * (2.0 * px / width - 1.0)
+        y = top * (1.0 - 2.0 * py / height)
+        U = camera.getU().getArray()[0:3, 0]
+        V = camera.getV().getArray()[0:3, 0]
+        N = camera.getN().getArray()[0:3, 0]
+        return camera.getE().getArray()[0:3, 0], x[:, None] * U + y[:, None] * V - nearPlane * N
+
+    @staticmethod
+    def isAnalytic(object):
+        return isinstance(object, parametricObject) and type(object).intersectRays is not parametricObject.intersectRays
+
+    def getTileSize(self):
+        return self.__tileSize
+
+    def setTileSize(self, tileSize):
+        self.__tileSize = tileSize
+
+    def getWorkers(self):
+        return self.__workers
+
+    def setWorkers(self, workers):
+        self.__workers = workers
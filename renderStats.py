@@ -0,0 +1,117 @@
+'''
+Module Name: renderStats
+
+Purpose: To collect per stage timings and counters of the render pipeline. Collection is off by default and the
+instrumented code then only pays for an attribute check, so the hooks can stay in place in production renders.
+Timing hooks registered with addHook receive every timed stage, for example to forward them to a monitoring system.
+The shared instance is process local, objects built by wireMesh worker processes are not counted.
+
+Parameters: enabled
+enabled: Whether statistics are collected from the start
+'''
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class renderStats:
+
+    DISABLED = nullcontext()  # Returned by time() while disabled; it keeps no state, so one instance serves every call
+
+    def __init__(self, enabled=False):
+        self.__enabled = enabled
+        self.__lock = threading.Lock()
+        self.__hooks = []
+        self.__counters = {}
+        self.__seconds = {}
+        self.__calls = {}
+
+    def isEnabled(self):
+        return self.__enabled
+
+    def enable(self):
+        self.__enabled = True
+
+    def disable(self):
+        self.__enabled = False
+
+    def reset(self):
+        with self.__lock:
+            self.__counters = {}
+            self.__seconds = {}
+            self.__calls = {}
+
+    '''
+    Purpose: To register a function called as hook(stage, seconds) each time a stage finishes while enabled
+
+    Parameters: (hook)
+    hook: The function to call
+
+    Output: N/A
+    '''
+    def addHook(self, hook):
+        self.__hooks.append(hook)
+
+    def removeHook(self, hook):
+        self.__hooks.remove(hook)
+
+    '''
+    Purpose: To add to a counter, does nothing when disabled
+
+    Parameters: (name, amount)
+    name: The counter name, such as "facesCulled"
+    amount: The amount to add
+
+    Output: N/A
+    '''
+    def count(self, name, amount=1):
+        if self.__enabled:
+            with self.__lock:
+                self.__counters[name] = self.__counters.get(name, 0) + int(amount)
+
+    '''
+    Purpose: To time a stage of the pipeline with a with statement
+
+    Parameters: (stage)
+    stage: The stage name, such as "projection"
+
+    Output: A context manager, a shared do nothing one when disabled
+    '''
+    def time(self, stage):
+        if not self.__enabled:
+            return renderStats.DISABLED
+        return self.__time(stage)
+
+    @contextmanager
+    def __time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.__lock:
+                self.__seconds[stage] = self.__seconds.get(stage, 0.0) + seconds
+                self.__calls[stage] = self.__calls.get(stage, 0) + 1
+            for hook in self.__hooks:
+                hook(stage, seconds)
+
+    def getCounter(self, name):
+        return self.__counters.get(name, 0)
+
+    def getSeconds(self, stage):
+        return self.__seconds.get(stage, 0.0)
+
+    '''
+    Purpose: To take a copy of the statistics collected since the last reset
+
+    Parameters: N/A
+
+    Output: A dictionary with "counters", "seconds" and "calls" dictionaries
+    '''
+    def getStats(self):
+        with self.__lock:
+            return {'counters': dict(self.__counters), 'seconds': dict(self.__seconds), 'calls': dict(self.__calls)}
+
+
+sharedRenderStats = renderStats()
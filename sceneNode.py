@@ -0,0 +1,111 @@
+'''
+Module Name: sceneNode
+
+Purpose: A node of a scene graph. Each node holds a local transformation, child nodes and attached parametric
+objects. The world matrix of a node is cached and only recomputed for the subtree below a node whose local
+transformation changed.
+
+Parameters: T, objectList, children
+T: The local transformation matrix relative to the parent node
+objectList: Parametric objects attached to the node. An object's own T is applied before the node's world matrix.
+children: Child nodes
+'''
+
+import numpy as np
+from matrix import matrix
+
+
+class sceneNode:
+
+    def __init__(self, T=None, objectList=(), children=()):
+        # The node keeps its own copy of T and hands out copies, so that in-place operators on a caller's matrix can
+        # never change the node behind the cached world matrices; setT is the only way to change it
+        self.__T = T.copyMatrix() if T is not None else matrix(np.identity(4))
+        self.__objectList = list(objectList)
+        self.__children = []
+        self.__parent = None
+        self.__world = None  # Cached world matrix, None while dirty
+        for child in children:
+            self.addChild(child)
+
+    '''
+    Purpose: To return the world matrix of the node, recomputing it only if the node is dirty
+
+    Parameters: N/A
+
+    Output: A copy of the 4x4 world matrix (matrix) = parent world matrix * local T
+    '''
+    def getWorldT(self):
+        return self.__getWorldT().copyMatrix()
+
+    def __getWorldT(self):
+        if self.__world is None:
+            if self.__parent is None:
+                self.__world = matrix(np.array(self.__T.getArray(), dtype=float))
+            else:
+                self.__world = self.__parent.__getWorldT()*self.__T
+        return self.__world
+
+    '''
+    Purpose: To collect the attached objects of the whole subtree with their world transformations
+
+    Parameters: N/A
+
+    Output: A list of (object, T) pairs in depth first order where T = node world matrix * object.getT()
+    '''
+    def getObjectTransforms(self):
+        pairs = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            world = node.__getWorldT()
+            pairs.extend((object, world*object.getT()) for object in node.getObjectList())
+            stack.extend(reversed(node.getChildren()))
+        return pairs
+
+    def invalidate(self):
+        # Marks the subtree dirty; subtrees which are already dirty are not visited again
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.__world = None
+            stack.extend(child for child in node.__children if child.__world is not None)
+
+    def isDirty(self):
+        return self.__world is None
+
+    def setT(self, T):
+        self.__T = T.copyMatrix()
+        self.invalidate()
+
+    def getT(self):
+        return self.__T.copyMatrix()
+
+    def addChild(self, child):
+        if child.__parent is not None:
+            child.__parent.removeChild(child)
+        child.__parent = self
+        self.__children.append(child)
+        child.invalidate()
+        return child
+
+    def removeChild(self, child):
+        self.__children.remove(child)
+        child.__parent = None
+        child.invalidate()
+
+    def addObject(self, object):
+        self.__objectList.append(object)
+        return object
+
+    def removeObject(self, object):
+        self.__objectList.remove(object)
+
+    def getChildren(self):
+        return self.__children
+
+    def getObjectList(self):
+        return self.__objectList
+
+    def getParent(self):
+        return self.__parent
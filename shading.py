@@ -0,0 +1,91 @@
+'''
+Module Name: shading
+
+Purpose: To light the faces or vertices of a mesh in bulk with the Phong reflection model, using each object's reflectance
+(ambient, diffuse, specular, shininess) and a set of directional light sources
+
+Parameters: lights
+lights: A list of (direction, intensity) pairs. direction points from the surface towards the light and is a vector
+        (matrix) or an (x,y,z) sequence; intensity is a float scaling the light's contribution.
+'''
+
+import numpy as np
+
+
+class shading:
+
+    def __init__(self, lights=None):
+        if lights is None:
+            lights = [((1.0, 1.0, 1.0), 1.0)]
+        self.__lights = []
+        for direction, intensity in lights:
+            self.addLight(direction, intensity)
+
+    def addLight(self, direction, intensity=1.0):
+        if hasattr(direction, 'getArray'):
+            direction = direction.getArray()[0:3, 0]
+        direction = np.asarray(direction, dtype=float)[0:3]
+        self.__lights.append((direction / np.linalg.norm(direction), float(intensity)))
+
+    def getLights(self):
+        return self.__lights
+
+    '''
+    Purpose: To compute one flat shaded color per face of a mesh
+
+    Parameters: (mesh, eye)
+    mesh: A wireMesh
+    eye: The camera position (point matrix), e.g. cameraMatrix.getE()
+
+    Output: An (F,3) uint8 array of face colors
+    '''
+    def shadeFaces(self, mesh, eye):
+        objectList = mesh.getObjectList()
+        if not objectList:
+            return np.empty((0, 3), dtype=np.uint8)
+        reflectance = np.array([object.getReflectance() for object in objectList], dtype=float)[mesh.getFaceObjectIds()]
+        intensity = self.illuminate(mesh.getFaceNormals(), mesh.getFaceCenters(), reflectance, eye)
+        return np.clip(mesh.getFaceColors() * intensity[:, None], 0.0, 255.0).astype(np.uint8)
+
+    '''
+    Purpose: To compute one color per vertex of a mesh from the interpolated surface normals, for Gouraud shading
+
+    Parameters: (mesh, eye)
+    mesh: A wireMesh
+    eye: The camera position (point matrix), e.g. cameraMatrix.getE()
+
+    Output: A (V,3) uint8 array of vertex colors
+    '''
+    def shadeVertices(self, mesh, eye):
+        objectList = mesh.getObjectList()
+        if not objectList:
+            return np.empty((0, 3), dtype=np.uint8)
+        objects = mesh.getVertexObjectIds()
+        reflectance = np.array([object.getReflectance() for object in objectList], dtype=float)[objects]
+        intensity = self.illuminate(mesh.getVertexNormals(), mesh.getVertexPositions(), reflectance, eye)
+        return np.clip(mesh.getVertexColors() * intensity[:, None], 0.0, 255.0).astype(np.uint8)
+
+    '''
+    Purpose: To evaluate the Phong reflection model for many surface points at once
+
+    Parameters: (normals, positions, reflectance, eye)
+    normals: (N,3) unit surface normals in world coordinates
+    positions: (N,3) world coordinates of the surface points
+    reflectance: (N,4) ambient, diffuse, specular and shininess coefficients of each point
+    eye: The camera position (point matrix)
+
+    Output: An (N,) array of light intensities. Surfaces are lit on the side facing the eye.
+    '''
+    def illuminate(self, normals, positions, reflectance, eye):
+        view = eye.getArray()[0:3, 0] - positions
+        view /= np.maximum(np.linalg.norm(view, axis=1, keepdims=True), 1e-12)
+        # Two sided lighting: open surfaces such as planes are seen from either side
+        normals = np.where((np.einsum('ij,ij->i', normals, view) < 0.0)[:, None], -normals, normals)
+        intensity = reflectance[:, 0].copy()
+        for direction, power in self.__lights:
+            diffuse = normals @ direction
+            lit = diffuse > 0.0
+            reflected = 2.0 * diffuse[:, None] * normals - direction
+            specular = np.maximum(np.einsum('ij,ij->i', reflected, view), 0.0) ** reflectance[:, 3]
+            intensity += power * np.where(lit, reflectance[:, 1] * diffuse + reflectance[:, 2] * specular, 0.0)
+        return intensity
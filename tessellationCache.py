@@ -0,0 +1,96 @@
+'''
+Module Name: tessellationCache
+
+Purpose: A least recently used cache of object space tessellations, so that objects which are rendered repeatedly
+with only the camera changing are not re-evaluated from scratch
+
+Parameters: maxBytes
+maxBytes: Memory budget of the cached arrays in bytes. The least recently used tessellations are evicted once it is exceeded.
+'''
+
+from collections import OrderedDict
+
+
+class tessellationCache:
+
+    def __init__(self, maxBytes=64*1024*1024):
+        self.__maxBytes = maxBytes
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    '''
+    Purpose: To return the tessellation of an object, computing and storing it on a miss
+
+    Parameters: object: A parametricObject
+
+    Output: The (points, normals, faces) triple of parametricObject.getTessellation(). The arrays are shared and read only.
+    '''
+    def get(self, object):
+        key = self.getKey(object)
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return entry
+        self.__misses += 1
+        entry = object.getTessellation()
+        for array in entry:
+            array.flags.writeable = False
+        size = sum(array.nbytes for array in entry)
+        if size <= self.__maxBytes:
+            self.__entries[key] = entry
+            self.__bytes += size
+            self.__evict()
+        return entry
+
+    '''
+    Purpose: To build the cache key of an object. Every setter which changes the tessellation changes the key, so stale
+    entries are never returned and simply age out of the cache.
+
+    Parameters: object: A parametricObject
+
+    Output: A hashable tuple of the object type, its shape parameters, u&v ranges and uvDelta
+    '''
+    @staticmethod
+    def getKey(object):
+        return (type(object), tuple(object.getShapeParameters()), tuple(object.getURange()),
+                tuple(object.getVRange()), tuple(object.getUVDelta()))
+
+    def __evict(self):
+        while self.__bytes > self.__maxBytes and self.__entries:
+            key, entry = self.__entries.popitem(last=False)
+            self.__bytes -= sum(array.nbytes for array in entry)
+            self.__evictions += 1
+
+    def clear(self):
+        self.__entries.clear()
+        self.__bytes = 0
+
+    def setMaxBytes(self, maxBytes):
+        self.__maxBytes = maxBytes
+        self.__evict()
+
+    def getMaxBytes(self):
+        return self.__maxBytes
+
+    def getNumberOfBytes(self):
+        return self.__bytes
+
+    def getNumberOfEntries(self):
+        return len(self.__entries)
+
+    def getHits(self):
+        return self.__hits
+
+    def getMisses(self):
+        return self.__misses
+
+    def getEvictions(self):
+        return self.__evictions
+
+    def getStats(self):
+        return {'hits': self.__hits, 'misses': self.__misses, 'evictions': self.__evictions,
+                'entries': len(self.__entries), 'bytes': self.__bytes, 'maxBytes': self.__maxBytes}
@@ -74,6 +74,6 @@ cone = parametricCone(coneT,coneHeight,coneRadius,coneCol,coneRef,(0.0,1.0),(0.0
 cylinder = parametricCylinder(cylinderT,cylinderHeight,cylinderRadius,cylinderCol,cylinderRef,(0.0,1.0),(0.0,2.0*pi),(1.0/10.0,pi/18.0))
 torus = parametricTorus(torusT,torusInnerRadius,torusOuterRadius,torusCol,torusRef,(0.0,2.0*pi),(0.0,2.0*pi),(pi/18.0,pi/9.0))
 
-window.drawWireMesh(wireMesh([plane,circle,sphere,cone,cylinder,torus],camera).getFaceList())
+window.drawWireMesh(wireMesh([plane,circle,sphere,cone,cylinder,torus],camera))
 window.saveImage("assignment2Image.png")
 window.showImage()
\ No newline at end of file
@@ -4,6 +4,8 @@ from matrix import matrix
 
 class transform(matrix):
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(np.identity(4))
 
@@ -23,12 +25,9 @@ class transform(matrix):
         return self
 
     def rotate(self,A=matrix(np.ones((3,1))),angle=0.0):
-        A = A.normalize()
-        V = matrix(np.zeros((4,4)))
-        V.set(0,1,-A.get(2,0))
-        V.set(0,2,A.get(1,0))
-        V.set(1,0,A.get(2,0))
-        V.set(1,2,-A.get(0,0))
-        V.set(2,0,-A.get(1,0))
-        V.set(2,1,A.get(0,0))
-        return self + V.scalarMultiply(sin(angle)) + (V*V).scalarMultiply(1.0-cos(angle))
\ No newline at end of file
+        x,y,z = A.getArray()[0:3,0]/A.norm()
+        V = np.array([[0.0,-z,y,0.0],
+                      [z,0.0,-x,0.0],
+                      [-y,x,0.0,0.0],
+                      [0.0,0.0,0.0,0.0]])
+        return matrix(self.getArray() + sin(angle)*V + (1.0-cos(angle))*(V @ V))
\ No newline at end of file
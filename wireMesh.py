@@ -1,24 +1,605 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from matrix import matrix
+from meshFile import meshFile
+from parameterGrid import sharedParameterGrid
+from renderStats import sharedRenderStats
+from sceneNode import sceneNode
+from instancedObject import instancedObject
+
 class wireMesh:
 
-    def __init__(self,objectList,camera):
-        self.__faceList = []  # List of faces with normals
-        EPSILON = 0.001
-        facePoints = []  # List of points for a face
-        for object in objectList:
-            c = object.getColor()  # Obtain object color
-            u = object.getURange()[0]
-            while u + object.getUVDelta()[0] < object.getURange()[1] + EPSILON:
-                v = object.getVRange()[0]
-                while v + object.getUVDelta()[1] < object.getVRange()[1] + EPSILON:
-                    # Collect surface points transformed into viewing coordinates
-                    facePoints.append(camera.worldToPixelCoordinates(object.getT()*object.getPoint(u,v)))
-                    facePoints.append(camera.worldToPixelCoordinates(object.getT()*object.getPoint(u,v+object.getUVDelta()[1])))
-                    facePoints.append(camera.worldToPixelCoordinates(object.getT()*object.getPoint(u+object.getUVDelta()[0],v+object.getUVDelta()[1])))
-                    facePoints.append(camera.worldToPixelCoordinates(object.getT()*object.getPoint(u+object.getUVDelta()[0],v)))
-                    self.__faceList.append((0.0,facePoints,c))
-                    facePoints = []
-                    v += object.getUVDelta()[1]
-                u += object.getUVDelta()[0]
+    RESULT_ARRAYS = 8  # Number of leading arrays in a buildObject result, followed by its counters
+    EMPTY = (np.empty((0,4)),np.empty(0),np.empty((0,4),dtype=int),np.empty((0,3)),np.empty((0,3)),
+             np.empty((0,3),dtype=np.uint8),np.empty((0,3)),np.empty((0,3)))  # buildObject arrays of an object without faces
+
+    '''
+    Purpose: To tessellate, cull, project and clip a list of objects into one indexed mesh
+
+    Parameters: (objectList, camera, backFaceCulling, frustumCulling, cache, workers, maxEdgeLength, lodRange)
+    objectList: The objects to build, or a sceneNode whose attached objects are built with their world matrices
+    camera: The cameraMatrix the mesh is projected with
+    backFaceCulling: Whether faces turned away from the eye are dropped (for objects which allow it)
+    frustumCulling: Whether objects whose bounding spheres lie outside the viewing volume are skipped
+    cache: Optional tessellationCache or meshFile the object space tessellations are taken from. With workers > 1
+           only a meshFile can be used, since the worker processes share it through its directory; its hit and miss
+           counts then stay in the workers.
+    workers: Number of processes building objects concurrently
+    maxEdgeLength: Optional target edge length in pixels which turns on adaptive tessellation (see getLevelOfDetail)
+    lodRange: The (lowest, highest) level of detail used by adaptive tessellation
+
+    Output: A wireMesh. A ValueError is raised for an in-memory tessellationCache with workers > 1.
+    '''
+    def __init__(self,objectList,camera,backFaceCulling=False,frustumCulling=True,cache=None,workers=1,maxEdgeLength=None,lodRange=(1,9)):
+        if workers > 1 and cache is not None and not isinstance(cache,meshFile):
+            raise ValueError("Only a meshFile cache can be shared with worker processes")
+        self.__objectList,transforms = wireMesh.__getTransforms(objectList)
+        # Digests of everything the mesh is built from, stored by save so that load can detect stale files
+        self.__hashes = (wireMesh.getObjectsHash(self.__objectList,transforms),
+                         wireMesh.getBuildHash(camera,backFaceCulling,frustumCulling,maxEdgeLength,lodRange))
+        if maxEdgeLength is not None:
+            # Adaptive tessellation: each object is built at the discrete level of detail which keeps its
+            # projected edges below maxEdgeLength pixels
+            buildList = [wireMesh.getLevelOfDetail(object,camera,maxEdgeLength,T,lodRange)
+                         for object, T in zip(self.__objectList,transforms)]
+        else:
+            buildList = self.__objectList
+        if workers > 1 and len(buildList) > 1:
+            results = self.__buildParallel(buildList,camera,transforms,backFaceCulling,frustumCulling,cache,workers)
+        else:
+            results = [wireMesh.buildObject(object,camera,backFaceCulling,frustumCulling,cache,T)
+                       for object, T in zip(buildList,transforms)]
+        self.__merge(results)
+
+    '''
+    Purpose: To assemble a mesh from per-object results of buildObject which were computed elsewhere
+
+    Parameters: (objectList, results, hashes)
+    objectList: The objects the results belong to
+    results: One buildObject result per object, in the same order
+    hashes: Optional (getObjectsHash, getBuildHash) digests of the build inputs, needed to save the mesh
+
+    Output: A wireMesh
+    '''
+    @classmethod
+    def fromResults(cls,objectList,results,hashes=None):
+        mesh = cls.__new__(cls)
+        mesh.__objectList = list(objectList)
+        mesh.__hashes = hashes
+        mesh.__merge(results)
+        return mesh
+
+    @staticmethod
+    def __getTransforms(objectList):
+        # Scene graphs supply the cached world matrix of every attached object, None stands for the object's own T
+        if isinstance(objectList,sceneNode):
+            pairs = objectList.getObjectTransforms()
+            return [object for object, T in pairs],[T for object, T in pairs]
+        objectList = list(objectList)
+        return objectList,[None]*len(objectList)
+
+    def __merge(self,results):
+        self.__culledObjects = sum(result[wireMesh.RESULT_ARRAYS] for result in results)
+        self.__culledFaces = sum(result[wireMesh.RESULT_ARRAYS+1] for result in results)
+        self.__clippedFaces = sum(result[wireMesh.RESULT_ARRAYS+2] for result in results)
+        vertexBlocks = []  # Pixel coordinates of each object's grid nodes
+        distanceBlocks = []  # Distance of each grid node in front of the eye along -N
+        faceBlocks = []  # Vertex indices of each object's quads
+        normalBlocks = []  # World space unit normal of each quad
+        centerBlocks = []  # World space center of each quad
+        colorBlocks = []  # Color of each quad
+        positionBlocks = []  # World space position of each grid node
+        vertexNormalBlocks = []  # World space unit normal of each grid node
+        objectBlocks = []  # Owning object of each quad
+        offset = 0
+        # Results are merged in the original object order whichever way they were built
+        for objectId, result in enumerate(results):
+            vertices,distances,faces,faceNormals,faceCenters,faceColors,positions,vertexNormals = result[0:wireMesh.RESULT_ARRAYS]
+            if faces.shape[0] == 0:
+                continue
+            vertexBlocks.append(vertices)
+            distanceBlocks.append(distances)
+            faceBlocks.append(faces+offset)
+            normalBlocks.append(faceNormals)
+            centerBlocks.append(faceCenters)
+            colorBlocks.append(faceColors)
+            positionBlocks.append(positions)
+            vertexNormalBlocks.append(vertexNormals)
+            objectBlocks.append(np.full(faces.shape[0],objectId))
+            offset += vertices.shape[0]
+        if faceBlocks:
+            self.__vertices = np.concatenate(vertexBlocks)
+            distances = np.concatenate(distanceBlocks)
+            width = max(faces.shape[1] for faces in faceBlocks)
+            self.__faces = np.concatenate([wireMesh.__padFaces(faces,width) for faces in faceBlocks])
+            self.__faceNormals = np.concatenate(normalBlocks)
+            self.__faceCenters = np.concatenate(centerBlocks)
+            self.__faceColors = np.concatenate(colorBlocks)
+            self.__vertexPositions = np.concatenate(positionBlocks)
+            self.__vertexNormals = np.concatenate(vertexNormalBlocks)
+            self.__faceObjects = np.concatenate(objectBlocks)
+        else:
+            self.__vertices = np.empty((0,4))
+            distances = np.empty(0)
+            self.__faces = np.empty((0,4),dtype=int)
+            self.__faceNormals = np.empty((0,3))
+            self.__faceCenters = np.empty((0,3))
+            self.__faceColors = np.empty((0,3),dtype=np.uint8)
+            self.__vertexPositions = np.empty((0,3))
+            self.__vertexNormals = np.empty((0,3))
+            self.__faceObjects = np.empty(0,dtype=int)
+        # Painter's algorithm key: view-space distance of each face centroid. Padding corners repeat the previous
+        # index and are left out so that they do not pull the centroid towards the last corner.
+        corners = np.ones(self.__faces.shape,dtype=bool)
+        corners[:,1:] = self.__faces[:,1:] != self.__faces[:,:-1]
+        self.__faceDepths = (distances[self.__faces]*corners).sum(axis=1)/corners.sum(axis=1)
+
+    '''
+    Purpose: To tessellate, cull, project and clip a single object
+
+    Parameters: (object, camera, backFaceCulling, frustumCulling, cache, T)
+    T: Optional world transformation used instead of object.getT()
+
+    Output: A (vertices, distances, faces, faceNormals, faceCenters, faceColors, vertexPositions, vertexNormals,
+    culledObjects, culledFaces, clippedFaces) tuple with the object's pixel coordinates, view distances, face indices
+    (local to the object), world space face normals and centers, face colors, world space vertex positions and unit
+    normals, and its culling/clipping counts
+    '''
+    @staticmethod
+    def buildObject(object,camera,backFaceCulling=False,frustumCulling=True,cache=None,T=None):
+        if T is None:
+            T = object.getT()
+        if isinstance(object,instancedObject):
+            return wireMesh.__buildInstances(object,camera,backFaceCulling,frustumCulling,cache,T)
+        # Skip objects whose bounding sphere lies outside the viewing volume before tessellating them
+        if frustumCulling and not camera.isSphereInFrustum(*object.getBoundingSphere(T)):
+            sharedRenderStats.count('objectsCulled')
+            return wireMesh.EMPTY+(1,0,0)
+        # Every (u,v) grid node is evaluated exactly once, or fetched from the cache
+        with sharedRenderStats.time('tessellation'):
+            points,normals,faces = cache.get(object) if cache is not None else object.getTessellation()
+        sharedRenderStats.count('facesGenerated',faces.shape[0])
+        if faces.shape[0] == 0:
+            return wireMesh.EMPTY+(0,0,0)
+        faceColors = np.broadcast_to(np.array(object.getColor(),dtype=np.uint8),(faces.shape[0],3))
+        culledFaces = 0
+        if backFaceCulling and object.getBackFaceCulling():
+            eye = camera.getE().getArray()[0:3,0]
+            with sharedRenderStats.time('backFaceCulling'):
+                points,normals,faces,keep = wireMesh.__cullBackFaces(T,points,normals,faces,eye)
+            faceColors = faceColors[keep]
+            culledFaces = int(keep.shape[0]-faces.shape[0])
+            sharedRenderStats.count('facesCulled',culledFaces)
+        return wireMesh.__projectObject(camera,T,points,normals,faces,faceColors,0,culledFaces)
+
+    '''
+    Purpose: To build all instances of an instancedObject together: the prototype is tessellated once, the instances
+    outside the viewing volume are dropped with one batched sphere test and the remaining copies are transformed with
+    one batched product before the whole group is culled, projected and clipped like a single object
+
+    Parameters: (object, camera, backFaceCulling, frustumCulling, cache, T)
+    T: The group transformation applied on top of the per instance transforms
+
+    Output: A buildObject result, culledObjects counts the culled instances
+    '''
+    @staticmethod
+    def __buildInstances(object,camera,backFaceCulling,frustumCulling,cache,T):
+        transforms = T.getArray() @ object.getTransforms()
+        colors = object.getInstanceColors()
+        culledObjects = 0
+        if frustumCulling:
+            visible = camera.areSpheresInFrustum(*object.getBoundingSpheres(T))
+            culledObjects = int(visible.shape[0]-np.count_nonzero(visible))
+            sharedRenderStats.count('objectsCulled',culledObjects)
+            transforms = transforms[visible]
+            colors = colors[visible]
+        prototype = object.getPrototype()
+        with sharedRenderStats.time('tessellation'):
+            points,normals,faces = cache.get(prototype) if cache is not None else prototype.getTessellation()
+        count = transforms.shape[0]
+        sharedRenderStats.count('facesGenerated',count*faces.shape[0])
+        if count == 0 or faces.shape[0] == 0:
+            return wireMesh.EMPTY+(culledObjects,0,0)
+        # World space grid nodes and normals of every copy at once; normals transform by the inverse transpose
+        world = np.einsum('kij,nj->kni',transforms,points).reshape(-1,4)
+        worldNormals = np.zeros((count,normals.shape[0],4))
+        worldNormals[:,:,0:3] = np.einsum('nj,kji->kni',normals[:,0:3],np.linalg.inv(transforms[:,0:3,0:3]))
+        worldNormals = worldNormals.reshape(-1,4)
+        faces = (faces[None]+(np.arange(count)*points.shape[0])[:,None,None]).reshape(-1,faces.shape[1])
+        faceColors = np.repeat(colors,faces.shape[0]//count,axis=0)
+        culledFaces = 0
+        if backFaceCulling and object.getBackFaceCulling():
+            eye = camera.getE().getArray()[0:3,0]
+            with sharedRenderStats.time('backFaceCulling'):
+                world,worldNormals,faces,keep = wireMesh.__cullBackFaces(None,world,worldNormals,faces,eye)
+            faceColors = faceColors[keep]
+            culledFaces = int(keep.shape[0]-faces.shape[0])
+            sharedRenderStats.count('facesCulled',culledFaces)
+        return wireMesh.__projectObject(camera,None,world,worldNormals,faces,faceColors,culledObjects,culledFaces)
+
+    @staticmethod
+    def __projectObject(camera,T,points,normals,faces,faceColors,culledObjects,culledFaces):
+        # T is None when the points are already in world space
+        if T is None:
+            positions,normals = points[:,0:3],normals[:,0:3]
+        else:
+            A = T.getArray()
+            positions,normals = points @ A[0:3].T,normals[:,0:3] @ np.linalg.inv(A[0:3,0:3])
+        # Flat shading inputs: the averaged corner normals and the centroid of every face in world space
+        faceNormals = normals[faces].sum(axis=1)
+        length = np.linalg.norm(faceNormals,axis=1,keepdims=True)
+        faceNormals /= np.where(length > 0.0,length,1.0)
+        faceCenters = positions[faces].mean(axis=1)
+        clippedFaces = 0
+        # Project the whole object in one pass; w is the distance in front of the eye
+        with sharedRenderStats.time('projection'):
+            image = camera.worldToImageCoordinatesBatch(points,T)
+        outside = (image[:,2] < -image[:,3]) | (image[:,2] > image[:,3])
+        clip = outside[faces].any(axis=1)
+        if clip.any():
+            clippedFaces = int(np.count_nonzero(clip))
+            sharedRenderStats.count('facesClipped',clippedFaces)
+            # The world position and normal of each corner are clipped along with it, so new corners interpolate them
+            with sharedRenderStats.time('clipping'):
+                data,faces,kept = wireMesh.__clipFaces(camera,np.concatenate((image,positions,normals),axis=1),faces,clip)
+            image,positions,normals = data[:,0:4],data[:,4:7],data[:,7:10]
+            faceNormals = np.concatenate((faceNormals[~clip],faceNormals[clip][kept]))
+            faceCenters = np.concatenate((faceCenters[~clip],faceCenters[clip][kept]))
+            faceColors = np.concatenate((faceColors[~clip],faceColors[clip][kept]))
+        length = np.linalg.norm(normals,axis=1,keepdims=True)
+        normals = normals/np.where(length > 0.0,length,1.0)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            vertices = image/image[:,3:4]
+        return (vertices,image[:,3],faces,faceNormals,faceCenters,faceColors,positions,normals,
+                culledObjects,culledFaces,clippedFaces)
+
+    '''
+    Purpose: To stream the faces of a list of objects in fixed size chunks without building the whole mesh, for
+    rendering where depth ordering is not required or is handled by a depth buffer
+
+    Parameters: (objectList, camera, chunkSize, maxBytes, backFaceCulling, frustumCulling, cache)
+    chunkSize: Maximum number of faces per chunk
+    maxBytes: Approximate ceiling on the working arrays of building a single object, larger objects are built in bands
+    of u rows. Objects which cross the near or far plane are budgeted as if every face were clipped.
+
+    Output: A generator of (corners, colors, objectIds) chunks: (F,K,4) pixel coordinates of the face corners with the
+    pseudo depth in column 2, (F,3) colors and (F,) indices into objectList
+    '''
+    @staticmethod
+    def streamFaces(objectList,camera,chunkSize=4096,maxBytes=64*1024*1024,backFaceCulling=False,frustumCulling=True,cache=None):
+        for objectId, object in enumerate(objectList):
+            for band in wireMesh.__bands(object,camera,maxBytes):
+                # The band's arrays are only referenced by __chunks, so they are freed before the next band is built
+                yield from wireMesh.__chunks(wireMesh.buildObject(band,camera,backFaceCulling,frustumCulling,
+                                                                  cache if band is object else None),chunkSize,objectId)
+
+    @staticmethod
+    def __chunks(result,chunkSize,objectId):
+        vertices,faces,faceColors = result[0],result[2],result[5]
+        del result
+        for first in range(0,faces.shape[0],chunkSize):
+            corners = vertices[faces[first:first+chunkSize]]
+            yield corners,faceColors[first:first+chunkSize],np.full(corners.shape[0],objectId)
+
+    @staticmethod
+    def __bands(object,camera,maxBytes):
+        if isinstance(object,instancedObject):
+            yield object
+            return
+        # Peak working set of buildObject per grid node (one face per node): object space points and normals, face
+        # indices, world positions and normals, one (F,4,3) corner temporary of the face normals or centers, face
+        # normals and centers, image and pixel coordinates. The measured peak is about 300 bytes.
+        NODE_BYTES = 4*8+4*8+4*8+3*8+3*8+4*3*8+3*8+3*8+4*8+4*8
+        # A clipped face carries its corners with 10 columns through Sutherland-Hodgman, about 3 KB at the peak. Only
+        # objects whose bounding sphere crosses the near or far plane can have clipped faces; all of them may be.
+        CLIPPED_FACE_BYTES = 3200
+        center,radius = object.getBoundingSphere()
+        Mv = camera.getMv().getArray()
+        distance = -(Mv[2,0:3] @ center+Mv[2,3])
+        crossing = abs(distance-camera.getNp()) <= radius or abs(distance-camera.getFp()) <= radius
+        nodeBytes = NODE_BYTES+CLIPPED_FACE_BYTES if crossing else NODE_BYTES
+        uRange = object.getURange()
+        uvDelta = object.getUVDelta()
+        uValues = sharedParameterGrid.getValues(uRange,uvDelta[0])
+        columns = sharedParameterGrid.getValues(object.getVRange(),uvDelta[1]).shape[0]
+        rows = max(int(maxBytes//(columns*nodeBytes)),2)
+        if uValues.shape[0] <= rows:
+            yield object
+            return
+        # Neighbouring bands share their boundary row so that no faces are lost between them
+        for first in range(0,uValues.shape[0]-1,rows-1):
+            last = min(first+rows-1,uValues.shape[0]-1)
+            band = copy.copy(object)
+            band.setURange((uValues[first],uValues[last]))
+            yield band
+
+    '''
+    Purpose: To choose the level of detail of an object from its projected size on screen
+
+    Parameters: (object, camera, maxEdgeLength, T, lodRange)
+    maxEdgeLength: Target maximum edge length in pixels
+    T: Optional world transformation used instead of object.getT()
+    lodRange: (lowest, highest) level; level k splits a parameter range into 2**k steps
+
+    Output: A shallow copy of the object whose uvDelta is set to the chosen level, so that the levels are discrete and
+    can be shared through a tessellationCache. The object itself is returned if its size cannot be measured.
+    '''
+    @staticmethod
+    def getLevelOfDetail(object,camera,maxEdgeLength,T=None,lodRange=(1,9)):
+        SAMPLES = 9
+        if isinstance(object,instancedObject):
+            # Instances share a single tessellation of their prototype
+            return object
+        if T is None:
+            T = object.getT()
+        uRange = object.getURange()
+        vRange = object.getVRange()
+        U = np.linspace(uRange[0],uRange[1],SAMPLES).reshape(-1,1)
+        V = np.linspace(vRange[0],vRange[1],SAMPLES).reshape(1,-1)
+        image = camera.worldToImageCoordinatesBatch(object.getPoints(U,V),T).reshape(SAMPLES,SAMPLES,4)
+        # Only samples in front of the near plane have meaningful pixel coordinates
+        visible = image[:,:,3] >= camera.getNp()
+        if not visible.any():
+            return object
+        pixels = image[:,:,0:2]/np.where(visible,image[:,:,3],1.0)[:,:,None]
+        levels = []
+        for axis in (0,1):
+            segments = np.linalg.norm(np.diff(pixels,axis=axis),axis=2)
+            both = visible[1:,:] & visible[:-1,:] if axis == 0 else visible[:,1:] & visible[:,:-1]
+            # Screen length of the longest u (or v) parameter line
+            length = np.where(both,segments,0.0).sum(axis=axis).max()
+            level = int(np.ceil(np.log2(max(length/maxEdgeLength,1.0))))
+            levels.append(min(max(level,lodRange[0]),lodRange[1]))
+        lod = copy.copy(object)
+        lod.setUVDelta(((uRange[1]-uRange[0])/2**levels[0],(vRange[1]-vRange[0])/2**levels[1]))
+        return lod
+
+    @staticmethod
+    def buildObjectShared(object,camera,backFaceCulling=False,frustumCulling=True,T=None,cache=None):
+        # Process pool entry point: the arrays are handed back through a shared memory block and
+        # only its name, the array layout and the counters are pickled
+        result = wireMesh.buildObject(object,camera,backFaceCulling,frustumCulling,cache,T)
+        arrays = [np.ascontiguousarray(array) for array in result[0:wireMesh.RESULT_ARRAYS]]
+        size = sum(array.nbytes for array in arrays)
+        if size == 0:
+            return None,[(array.shape,array.dtype.str) for array in arrays],result[wireMesh.RESULT_ARRAYS:]
+        block = shared_memory.SharedMemory(create=True,size=size)
+        layout = []
+        position = 0
+        for array in arrays:
+            np.ndarray(array.shape,array.dtype,block.buf,position)[...] = array
+            layout.append((array.shape,array.dtype.str))
+            position += array.nbytes
+        block.close()
+        # The parent process unlinks the block once it has copied the arrays. The block stays registered with the
+        # resource tracker the workers share with the parent, which removes it should the parent never get to do so.
+        return block.name,layout,result[wireMesh.RESULT_ARRAYS:]
+
+    def __buildParallel(self,objectList,camera,transforms,backFaceCulling,frustumCulling,cache,workers):
+        # Started before the workers so that they register their blocks with it instead of with trackers of their own
+        resource_tracker.ensure_running()
+        with ProcessPoolExecutor(max_workers=min(workers,len(objectList))) as pool:
+            futures = [pool.submit(wireMesh.buildObjectShared,object,camera,backFaceCulling,frustumCulling,T,cache)
+                       for object, T in zip(objectList,transforms)]
+            try:
+                return [wireMesh.__readShared(*future.result()) for future in futures]
+            finally:
+                # Every block created is unlinked, also when another task raised and the results are abandoned
+                wait(futures)
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None and future.result()[0] is not None:
+                        block = shared_memory.SharedMemory(name=future.result()[0])
+                        block.close()
+                        block.unlink()
+
+    @staticmethod
+    def __readShared(name,layout,counters):
+        if name is None:
+            return tuple(np.empty(shape,dtype) for shape,dtype in layout)+tuple(counters)
+        block = shared_memory.SharedMemory(name=name)
+        arrays = []
+        position = 0
+        for shape,dtype in layout:
+            array = np.ndarray(shape,dtype,block.buf,position)
+            arrays.append(array.copy())
+            position += array.nbytes
+        block.close()
+        return tuple(arrays)+tuple(counters)
+
+    @staticmethod
+    def __clipFaces(camera,image,faces,clip):
+        # Faces crossing the near or far plane are replaced by their clipped polygons, whose corners
+        # are appended as new vertices; unused corners repeat the index of the polygon's last vertex
+        polygons,counts = camera.clipPolygons(image[faces[clip]])
+        kept = counts > 0
+        polygons,counts = polygons[kept],counts[kept]
+        used = np.arange(polygons.shape[1]) < counts[:,None]
+        starts = image.shape[0]+np.cumsum(counts)-counts
+        corners = starts[:,None]+np.minimum(np.arange(polygons.shape[1]),counts[:,None]-1)
+        image = np.concatenate((image,polygons[used]))
+        width = max(faces.shape[1],corners.shape[1])
+        faces = np.concatenate((wireMesh.__padFaces(faces[~clip],width),wireMesh.__padFaces(corners,width)))
+        return image,faces,kept
+
+    @staticmethod
+    def __padFaces(faces,width):
+        if faces.shape[1] >= width:
+            return faces
+        return np.concatenate((faces,np.repeat(faces[:,-1:],width-faces.shape[1],axis=1)),axis=1)
+
+    @staticmethod
+    def __cullBackFaces(T,points,normals,faces,eye):
+        # A grid node faces the eye when its outward normal points towards it; a face is kept
+        # while any of its corners does so that silhouette faces are never dropped
+        if T is None:
+            world = points
+            worldNormals = normals[:,0:3]
+        else:
+            T = T.getArray()
+            world = points @ T.T
+            worldNormals = normals[:,0:3] @ np.linalg.inv(T[0:3,0:3])
+        facing = np.einsum('ij,ij->i',worldNormals,eye-world[:,0:3]) > 0.0
+        keep = facing[faces].any(axis=1)
+        faces = faces[keep]
+        # Only the vertices of the remaining faces are projected
+        used = np.unique(faces)
+        lookup = np.zeros(points.shape[0],dtype=faces.dtype)
+        lookup[used] = np.arange(used.shape[0])
+        return points[used],normals[used],lookup[faces],keep
+
+    def getVertices(self):
+        return self.__vertices
+
+    def getFaces(self):
+        return self.__faces
+
+    def getFaceColors(self):
+        return self.__faceColors
+
+    def getVertexPositions(self):
+        return self.__vertexPositions
+
+    def getVertexNormals(self):
+        return self.__vertexNormals
+
+    '''
+    Purpose: To spread the face colors or object ids onto the vertices. Every vertex belongs to the faces of a single
+    object (or instance), so all faces sharing it agree.
+
+    Parameters: N/A
+
+    Output: A (V,3) uint8 array of vertex colors, or a (V,) array of indices into the object list
+    '''
+    def getVertexColors(self):
+        colors = np.zeros((self.__vertices.shape[0],3),dtype=np.uint8)
+        colors[self.__faces] = self.__faceColors[:,None]
+        return colors
+
+    def getVertexObjectIds(self):
+        objects = np.zeros(self.__vertices.shape[0],dtype=int)
+        objects[self.__faces] = self.__faceObjects[:,None]
+        return objects
+
+    def getFaceObjectIds(self):
+        return self.__faceObjects
+
+    def getFaceDepths(self):
+        return self.__faceDepths
+
+    def getFaceNormals(self):
+        return self.__faceNormals
+
+    def getFaceCenters(self):
+        return self.__faceCenters
+
+    def getObjectList(self):
+        return self.__objectList
+
+    def getNumberOfFaces(self):
+        return self.__faces.shape[0]
+
+    def getNumberOfCulledFaces(self):
+        return self.__culledFaces
+
+    def getNumberOfCulledObjects(self):
+        return self.__culledObjects
+
+    def getNumberOfClippedFaces(self):
+        return self.__clippedFaces
+
+    '''
+    Purpose: To write the mesh arrays to a mesh file which load can memory map. The file records the digests of the
+    objects, transforms, camera and build settings the mesh was built with.
+
+    Parameters: fileName: The mesh file to write
+
+    Output: N/A. A ValueError is raised for a mesh assembled by fromResults without its digests.
+    '''
+    def save(self,fileName):
+        if self.__hashes is None:
+            raise ValueError("The mesh was assembled without the digests of its build inputs")
+        arrays = {'vertices': self.__vertices,'faces': self.__faces,'faceColors': self.__faceColors,
+                  'faceObjects': self.__faceObjects,'faceDepths': self.__faceDepths,'faceNormals': self.__faceNormals,
+                  'faceCenters': self.__faceCenters,'vertexPositions': self.__vertexPositions,
+                  'vertexNormals': self.__vertexNormals,
+                  'counts': np.array([self.__culledObjects,self.__culledFaces,self.__clippedFaces]),
+                  'hashes': np.frombuffer(b''.join(self.__hashes),dtype=np.uint8).reshape(2,-1)}
+        meshFile.write(fileName,arrays,meshFile.getHash(*self.__hashes))
+
+    '''
+    Purpose: To load a mesh written by save without rebuilding it. The arrays are memory mapped, so loading costs
+    almost nothing until the mesh is drawn.
+
+    Parameters: (fileName, objectList, camera, backFaceCulling, frustumCulling, maxEdgeLength, lodRange)
+    fileName: The mesh file to read
+    objectList: Optional objects or sceneNode the mesh was built from, needed by getObjectList and getFaceList
+    camera, ...: Optional camera and build settings as given to the constructor
+
+    Output: A wireMesh. A ValueError is raised if objectList is given and the objects, their tessellation parameters,
+    colors or world transforms differ from those the file was built with, or if camera is given and it or the build
+    settings differ.
+    '''
+    @classmethod
+    def load(cls,fileName,objectList=(),camera=None,backFaceCulling=False,frustumCulling=True,maxEdgeLength=None,lodRange=(1,9)):
+        arrays,contentHash = meshFile.read(fileName)
+        objectsHash,buildHash = (bytes(digest) for digest in arrays['hashes'])
+        objectList,transforms = cls.__getTransforms(objectList)
+        if objectList and objectsHash != cls.getObjectsHash(objectList,transforms):
+            raise ValueError("The mesh file " + fileName + " was generated from different objects or transforms")
+        if camera is not None and buildHash != cls.getBuildHash(camera,backFaceCulling,frustumCulling,maxEdgeLength,lodRange):
+            raise ValueError("The mesh file " + fileName + " was generated with a different camera or build settings")
+        mesh = cls.__new__(cls)
+        mesh.__objectList = objectList
+        mesh.__hashes = (objectsHash,buildHash)
+        mesh.__vertices = arrays['vertices']
+        mesh.__faces = arrays['faces']
+        mesh.__faceColors = arrays['faceColors']
+        mesh.__faceObjects = arrays['faceObjects']
+        mesh.__faceDepths = arrays['faceDepths']
+        mesh.__faceNormals = arrays['faceNormals']
+        mesh.__faceCenters = arrays['faceCenters']
+        mesh.__vertexPositions = arrays['vertexPositions']
+        mesh.__vertexNormals = arrays['vertexNormals']
+        mesh.__culledObjects,mesh.__culledFaces,mesh.__clippedFaces = (int(count) for count in arrays['counts'])
+        return mesh
+
+    '''
+    Purpose: To hash the objects a mesh is built from: their tessellation parameters, colors, back face culling flags
+    and the world transforms used for them
+
+    Parameters: (objectList, transforms)
+    transforms: Optional world matrices, one per object; None entries stand for the object's own T
+
+    Output: A 32 byte digest
+    '''
+    @staticmethod
+    def getObjectsHash(objectList,transforms=None):
+        if transforms is None:
+            transforms = [None]*len(objectList)
+        return meshFile.getHash([(meshFile.getObjectHash(object),T if T is not None else object.getT(),object.getColor(),
+                                  object.getBackFaceCulling()) for object, T in zip(objectList,transforms)])
+
+    '''
+    Purpose: To hash the camera and the build settings a mesh is built with
+
+    Parameters: (camera, backFaceCulling, frustumCulling, maxEdgeLength, lodRange): As given to the constructor
+
+    Output: A 32 byte digest
+    '''
+    @staticmethod
+    def getBuildHash(camera,backFaceCulling=False,frustumCulling=True,maxEdgeLength=None,lodRange=(1,9)):
+        view = (camera.getUP(),camera.getE(),camera.getG(),float(camera.getNp()),float(camera.getFp()),float(camera.getTheta()),
+                camera.getWidth(),camera.getHeight())
+        # The level of detail range only matters when adaptive tessellation is on
+        return meshFile.getHash(view,bool(backFaceCulling),bool(frustumCulling),maxEdgeLength,
+                                tuple(lodRange) if maxEdgeLength is not None else None)
 
     def getFaceList(self):
-        return self.__faceList
\ No newline at end of file
+        # Compatibility view: (depth, [4 pixel-coordinate matrices], color) per face
+        faceList = []
+        for depth, face, color in zip(self.__faceDepths,self.__faces,self.__faceColors):
+            facePoints = [matrix(self.__vertices[i].reshape(4,1)) for i in face]
+            faceList.append((depth,facePoints,tuple(int(c) for c in color)))
+        return faceList